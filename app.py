@@ -1,15 +1,115 @@
+import time
+script_start = time.perf_counter()
+
 import streamlit as st
-import asyncio
-import pandas as pd
-from io import BytesIO
-from googleNewsExtractor import NewsGatherer
-from linkResolver import SeleniumLinkResolver
-from linkScraper import WebScraper
-from summarizer import ArticleSummarizer
+import functools
+import logging
+import os
+import tempfile
+import threading
+import summarizer
 
 # Page configuration
 st.set_page_config(page_title="SENTINEL", layout="wide", initial_sidebar_state="expanded")
 
+@st.cache_resource(show_spinner=False)
+def start_model_warm_up():
+    # Runs once per server process; the loaded model is shared by every session
+    thread = threading.Thread(target=summarizer.warm_up, daemon=True)
+    thread.start()
+    return thread
+
+start_model_warm_up()
+
+@st.cache_resource(show_spinner=False)
+def get_article_store():
+    from articleStore import ArticleStore
+    return ArticleStore("sentinel.db")
+
+@st.cache_resource(show_spinner=False)
+def get_http_cache():
+    from httpCache import HTTPCache
+    return HTTPCache("http_cache.sqlite3")
+
+@st.cache_resource(show_spinner=False)
+def get_summary_cache():
+    from summaryCache import SummaryCache
+    return SummaryCache("summary_cache.sqlite3")
+
+def build_pipeline(params, metrics, store, http_cache, summary_cache):
+    """
+    Build the NewsPipeline for one job from the Dashboard form parameters.
+    Runs on a job thread, so the shared resources are passed in rather than looked up.
+    """
+    # Pipeline modules pull in aiohttp, selenium and friends, so only import them for a run
+    from googleNewsExtractor import NewsGatherer
+    from rssNewsGatherer import RSSNewsGatherer
+    from linkResolver import HTTPLinkResolver
+    from linkScraper import WebScraper
+    from pipeline import NewsPipeline
+    from dedup import NearDuplicateDetector
+    from extractiveSummarizer import ExtractiveSummarizer
+
+    gatherer_class = RSSNewsGatherer if params["ingestion"] == "RSS" else NewsGatherer
+    news_gatherer = gatherer_class(params["search_queries"], params["date_of_news"], params["num_urls"], None,
+                                   params["location"], params["language"], metrics=metrics, http_cache=http_cache)
+    link_resolver = HTTPLinkResolver(cache_file="resolved_links.json", metrics=metrics)
+    scraper = WebScraper(None, metrics=metrics, http_cache=http_cache)
+    if params["mode"] == "Extractive":
+        article_summarizer = ExtractiveSummarizer(metrics=metrics)
+    else:
+        prefilter = ExtractiveSummarizer(metrics=metrics) if params["mode"] == "Hybrid" else None
+        article_summarizer = summarizer.ArticleSummarizer(cache=summary_cache, metrics=metrics,
+                                                          num_workers=params["num_workers"],
+                                                          threads_per_worker=params["threads_per_worker"] or None,
+                                                          engine=params["engine"], decoding=params["decoding"],
+                                                          prefilter=prefilter)
+    # Every job writes to its own run in the store, so concurrent jobs never mix their articles
+    return NewsPipeline(news_gatherer, link_resolver, scraper, article_summarizer,
+                        store=store, deduplicator=NearDuplicateDetector(), metrics=metrics)
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager():
+    from jobs import JobManager
+    return JobManager(functools.partial(build_pipeline, store=get_article_store(), http_cache=get_http_cache(),
+                                        summary_cache=get_summary_cache()))
+
+def discard_export(prepared):
+    if os.path.exists(prepared["path"]):
+        os.remove(prepared["path"])
+
+def render_metrics(metrics, placeholder):
+    """
+    Draw the live metrics panel for one run into a sidebar placeholder.
+    """
+    snapshot = metrics.snapshot()
+    counters = snapshot['counters']
+    timings = snapshot['timings']
+    with placeholder.container():
+        st.markdown("## Run Metrics")
+        col1, col2 = st.columns(2)
+        col1.metric("Links gathered", int(counters.get('pipeline.gathered', 0)))
+        col2.metric("URLs resolved", int(counters.get('pipeline.resolved', 0)))
+        col1.metric("Pages scraped", int(counters.get('scrape.fetched', 0)))
+        col2.metric("403 / failed", f"{int(counters.get('scrape.forbidden', 0))} / {int(counters.get('scrape.failed', 0))}")
+        col1.metric("Summarized", int(counters.get('pipeline.summarized', 0)))
+        col2.metric("Duplicates", int(counters.get('pipeline.duplicate', 0)))
+        col1.metric("Summary cache hits", f"{metrics.hit_rate('summarize.cache_hits', 'summarize.cache_misses'):.0%}")
+        http_requests = sum(counters.get(f'http_cache.{name}', 0) for name in ('hits', 'revalidated', 'misses'))
+        http_served = counters.get('http_cache.hits', 0) + counters.get('http_cache.revalidated', 0)
+        col1.metric("HTTP cache served", f"{http_served / http_requests:.0%}" if http_requests else "–")
+        col2.metric("Tokens in / out", f"{int(counters.get('summarize.tokens_in', 0))} / {int(counters.get('summarize.tokens_out', 0))}")
+        rows = [
+            {"Timing": name, "Count": timing['count'], "Mean (s)": round(timing['mean'], 3), "Max (s)": round(timing['max'], 3)}
+            for name, timing in sorted(timings.items())
+        ]
+        rows += [
+            {"Timing": f"stage {name}", "Count": 1, "Mean (s)": round(stage['seconds'], 3), "Max (s)": round(stage['seconds'], 3)}
+            for name, stage in sorted(snapshot['stages'].items()) if stage['seconds'] is not None
+        ]
+        if rows:
+            st.dataframe(rows, hide_index=True)
+
 # Custom CSS for blue theme and professional look
 st.markdown("""
     <style>
@@ -104,84 +204,158 @@ if page == "Dashboard":
         with col1:
             search_queries = st.text_area("Search Queries (one per line)", height=100)
             num_urls = st.number_input("Number of URLs to analyze", min_value=1, max_value=100, value=10)
+            cpu_count = os.cpu_count() or 1
+            num_workers = st.number_input("Summarization worker processes", min_value=1, max_value=cpu_count, value=1,
+                                          help="Each worker loads its own copy of the model")
+            threads_per_worker = st.number_input("Threads per worker (0 = auto)", min_value=0, max_value=cpu_count,
+                                                 value=0)
         
         with col2:
             location = st.selectbox("Location", ["IN", "US", "UK",  "CA", "AU"])
             language = st.selectbox("Language", ["en", "es", "fr", "de", "it"])
             date_of_news = st.select_slider("Date Range", options=["1d", "7d", "1m", "3m", "1y", "anytime"])
+            ingestion = st.radio("Ingestion", ["HTML", "RSS"], horizontal=True,
+                                 help="RSS reads the Google News feed: smaller, faster, with publisher and date")
+            mode = st.radio("Summarization mode", ["Abstractive", "Extractive", "Hybrid"], horizontal=True,
+                            help="Extractive picks key sentences in seconds; Hybrid feeds them to the model")
+            engine = st.selectbox("Summarization engine", ["torch", "torch-int8", "onnx", "distilbart"])
+            decoding = st.selectbox("Decoding profile", ["legacy", "deterministic", "quality beam", "fast greedy"])
+            profiler = st.selectbox("Profiler", ["None", "cProfile", "pyinstrument"],
+                                    help="Profile the CPU work of each stage (page parsing, Selenium fallback, "
+                                         "summarization); one report per stage is shown below the results. "
+                                         "Calls running in parallel with a profiled one are not profiled, so each "
+                                         "report says how many calls it covers. Summarization in worker "
+                                         "processes is not included")
 
         submit_button = st.form_submit_button("Run Analysis")
 
     if submit_button:
-        search_queries = search_queries.split('\n')
+        search_queries = [query.strip() for query in search_queries.split('\n') if query.strip()]
         if not search_queries:
             st.error("Please enter at least one search query.")
         else:
-            with st.spinner("Analyzing news... This may take several minutes."):
-                # Step 1: Google News Extraction
-                news_output_file = "links_temp.txt"
-                news_gatherer = NewsGatherer(search_queries, date_of_news, num_urls, news_output_file, location, language)
-                asyncio.run(news_gatherer.gather_and_save_news())
-
-                # Step 2: Link Resolution
-                selenium_resolver = SeleniumLinkResolver()
-                selenium_resolver.resolve_links('links_temp.txt', 'links.txt', max_workers=5, batch_size=10)
-
-                # Step 3: Web Scraping
-                scraper = WebScraper('links.txt')
-                scraper.process_urls()
-
-                # Step 4: Summarization
-                summarizer = ArticleSummarizer("Content.txt", "summaries.txt")
-                summarizer.summarize_articles()
+            params = {
+                "search_queries": search_queries,
+                "date_of_news": date_of_news,
+                "ingestion": ingestion,
+                "num_urls": int(num_urls),
+                "location": location,
+                "language": language,
+                "mode": mode,
+                "engine": engine,
+                "decoding": decoding,
+                "num_workers": int(num_workers),
+                "threads_per_worker": int(threads_per_worker),
+            }
+            job = get_job_manager().submit(params, profiler=None if profiler == "None" else profiler.lower())
+            st.session_state["job_id"] = job.id
+            st.session_state["metrics"] = job.metrics
+            if job.subscribers > 1:
+                st.info("An identical analysis is already running, showing its progress instead of starting another.")
+
+    job = get_job_manager().get(st.session_state["job_id"]) if "job_id" in st.session_state else None
+    if job is not None:
+        results = job.results()
+        if job.in_flight:
+            status = "Queued" if job.status == "queued" else f"Summarized {len(results)} articles so far..."
+            st.progress(min(len(results) / job.params["num_urls"], 1.0), text=status)
+        elif job.status == "done":
+            st.success(f"Analysis complete! {len(results)} articles summarized. View results in the 'Analysis Results' tab.")
+        else:
+            st.error(f"Analysis failed: {job.error}")
 
-            st.success("Analysis complete! View results in the 'Analysis Results' tab.")
+        render_metrics(job.metrics, st.sidebar.empty())
+        for article in results:
+            st.markdown(f"**{article['title']}** — {article['summary']}")
+        for name, report in job.metrics.profiles.items():
+            profiled, calls = job.metrics.profile_coverage(name)
+            coverage = f" ({profiled} of {calls} calls)" if calls else ""
+            with st.expander(f"Profile: {name}{coverage}"):
+                st.code(report)
 
 elif page == "Analysis Results":
     st.header("News Analysis Results")
 
-    try:
-        # Read the summaries
-        with open("summaries.txt", "r", encoding='utf-8') as f:
-            summaries = f.read().split("\n\n")
-
-        # Read the URLs and titles
-        with open("heading.txt", "r", encoding='utf-8') as f:
-            headings = f.read().split("\n\n")
-
-        # Create a list to store the data
-        data = []
-
-        for summary, heading in zip(summaries, headings):
-            heading_lines = heading.split("\n")
-            if len(heading_lines) >= 2:
-                url = heading_lines[0].replace("Link: ", "")
-                title = heading_lines[1].replace("Heading: ", "")
-                summary_text = summary.split("\n", 1)[1] if "\n" in summary else ""
-                data.append({"Title": title, "URL": url, "Summary": summary_text})
-
-        # Create a DataFrame
-        df = pd.DataFrame(data)
-
-        # Download button at the top
-        if not df.empty:
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-            processed_data = output.getvalue()
-            st.download_button(
-                label="Download Analysis Results (Excel)",
-                data=processed_data,
-                file_name="sentinel_analysis_results.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-
-        # Display the data
-        for _, row in df.iterrows():
-            st.markdown(f"### {row['Title']}")
-            st.markdown(f"**Source:** [{row['URL']}]({row['URL']})")
-            st.markdown(f"**Summary:** {row['Summary']}")
-            st.markdown("---")
-
-    except FileNotFoundError:
+    store = get_article_store()
+    # Show this session's job, falling back to the latest run of any session
+    job = get_job_manager().get(st.session_state["job_id"]) if "job_id" in st.session_state else None
+    run_id = job.run_id if job is not None and job.run_id else store.latest_run_id()
+
+    if not run_id or not store.count_articles(run_id):
         st.info("No analysis results available. Please run an analysis from the Dashboard first.")
+    else:
+        col1, col2 = st.columns([3, 1])
+        search = col1.text_input("Search titles, summaries and URLs").strip()
+        page_size = col2.selectbox("Articles per page", [10, 25, 50, 100], index=1)
+        total = store.count_articles(run_id, search)
+        page_count = max(1, -(-total // page_size))
+        page_number = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+        offset = (page_number - 1) * page_size
+
+        # Exports are only generated when asked for, streamed to a temporary file batch by batch
+        from resultsExport import FORMATS, export
+        col1, col2 = st.columns([1, 3])
+        export_format = col1.selectbox("Export format", list(FORMATS), label_visibility="collapsed")
+        export_key = (run_id, search, export_format)
+        prepared = st.session_state.get("export")
+        if prepared is not None and prepared["key"] != export_key:
+            # The run, search or format changed, so the prepared file no longer matches the page
+            discard_export(st.session_state.pop("export"))
+            prepared = None
+        if col2.button("Prepare export"):
+            if prepared is not None:
+                discard_export(st.session_state.pop("export"))
+            extension, _ = FORMATS[export_format]
+            # Every export gets its own file, so concurrent sessions never overwrite each other's
+            handle, path = tempfile.mkstemp(prefix="sentinel_", suffix=f".{extension}")
+            os.close(handle)
+            with st.spinner("Exporting..."):
+                try:
+                    exported = export(store, run_id, export_format, path, search)
+                    st.session_state["export"] = {"key": export_key, "path": path, "count": exported}
+                except ImportError as e:
+                    os.remove(path)
+                    st.error(str(e))
+            prepared = st.session_state.get("export")
+        if prepared is not None and os.path.exists(prepared["path"]):
+            extension, mime = FORMATS[export_format]
+            with open(prepared["path"], "rb") as file:
+                st.download_button(f"Download {prepared['count']} articles ({export_format.upper()})", file,
+                                   file_name=f"sentinel_analysis_results.{extension}", mime=mime)
+
+        st.caption(f"Showing {min(offset + 1, total)}–{min(offset + page_size, total)} of {total} articles")
+        articles = store.page(run_id, offset, page_size, search)
+        alternate_sources = store.alternate_sources(run_id, [article["id"] for article in articles])
+        for article in articles:
+            url = article["resolved_url"] or article["url"]
+            text = f"### {article['title']}\n**Source:** [{url}]({url})"
+            if article["publisher"]:
+                text += f" — {article['publisher']}"
+            if article["published_at"]:
+                text += f", {time.strftime('%Y-%m-%d %H:%M', time.localtime(article['published_at']))}"
+            text += f"\n\n**Summary:** {article['summary']}"
+            if article["id"] in alternate_sources:
+                links = ", ".join(f"[{source}]({source})" for source in alternate_sources[article["id"]])
+                text += f"\n\n**Also reported by:** {links}"
+            st.markdown(text + "\n\n---")
+
+# Metrics export for the last run in this session
+if "metrics" in st.session_state:
+    with st.sidebar:
+        st.markdown("## Export Metrics")
+        last_metrics = st.session_state["metrics"]
+        st.download_button("Metrics (JSON)", last_metrics.to_json(), file_name="sentinel_metrics.json",
+                           mime="application/json")
+        st.download_button("Metrics (Prometheus)", last_metrics.to_prometheus(), file_name="sentinel_metrics.prom",
+                           mime="text/plain")
+
+# Startup-time measurement for this script run
+script_seconds = time.perf_counter() - script_start
+logging.info(f"Script run took {script_seconds * 1000:.0f} ms")
+with st.sidebar:
+    st.caption(f"Page rendered in {script_seconds * 1000:.0f} ms")
+
+# Poll the running job: rerun the script every couple of seconds until it has finished
+if page == "Dashboard" and job is not None and job.in_flight:
+    time.sleep(2)
+    st.rerun()
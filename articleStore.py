@@ -0,0 +1,226 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+class ArticleStore:
+    """
+    Embedded SQLite store (WAL mode) for everything a run produces.
+    Each article row holds the gathered link, the resolved URL, title, body,
+    summary, the query it came from, the publisher and publish time when the
+    feed provides them, and timestamps, and is updated in place
+    as it moves through the pipeline. Rows are indexed by URL and content hash.
+    Inputs:
+    path : str, optional
+        The file path of the database (default is sentinel.db).
+    """
+    schema = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id TEXT PRIMARY KEY,
+            queries TEXT NOT NULL,
+            params TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY,
+            run_id TEXT NOT NULL REFERENCES runs (id),
+            position INTEGER NOT NULL,
+            query TEXT,
+            url TEXT NOT NULL,
+            resolved_url TEXT,
+            title TEXT,
+            body TEXT,
+            content_hash TEXT,
+            summary TEXT,
+            duplicate_of INTEGER REFERENCES articles (id),
+            publisher TEXT,
+            published_at REAL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS articles_run ON articles (run_id, position);
+        CREATE INDEX IF NOT EXISTS articles_url ON articles (url);
+        CREATE INDEX IF NOT EXISTS articles_resolved_url ON articles (resolved_url);
+        CREATE INDEX IF NOT EXISTS articles_content_hash ON articles (content_hash);
+    """
+    # Columns added after the first release, applied to older databases on open
+    migrations = {
+        'duplicate_of': "ALTER TABLE articles ADD COLUMN duplicate_of INTEGER REFERENCES articles (id)",
+        'publisher': "ALTER TABLE articles ADD COLUMN publisher TEXT",
+        'published_at': "ALTER TABLE articles ADD COLUMN published_at REAL",
+    }
+    columns = ['id', 'run_id', 'position', 'query', 'url', 'resolved_url', 'title', 'body',
+               'content_hash', 'summary', 'duplicate_of', 'publisher', 'published_at', 'created_at', 'updated_at']
+
+    def __init__(self, path='sentinel.db'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            existing = {row[1] for row in self.connection.execute("PRAGMA table_info(articles)")}
+            if existing:
+                for column, statement in self.migrations.items():
+                    if column not in existing:
+                        self.connection.execute(statement)
+            self.connection.executescript(self.schema)
+
+    @staticmethod
+    def content_hash(body):
+        return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+    def execute(self, sql, params=()):
+        with self.lock, self.connection:
+            return self.connection.execute(sql, params)
+
+    def query(self, sql, params=()):
+        with self.lock:
+            cursor = self.connection.execute(sql, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    def start_run(self, queries, **params):
+        run_id = uuid.uuid4().hex
+        self.execute(
+            "INSERT INTO runs (id, queries, params, created_at) VALUES (?, ?, ?, ?)",
+            (run_id, json.dumps(list(queries)), json.dumps(params, sort_keys=True), time.time())
+        )
+        return run_id
+
+    def latest_run_id(self):
+        rows = self.query("SELECT id FROM runs ORDER BY created_at DESC LIMIT 1")
+        return rows[0]['id'] if rows else None
+
+    def add_link(self, run_id, position, url, query=None, title=None, publisher=None, published_at=None):
+        """
+        Add a gathered link to a run. title is the headline from the news feed, if
+        any, and is replaced by the scraped title later on.
+        """
+        now = time.time()
+        cursor = self.execute(
+            "INSERT INTO articles (run_id, position, query, url, title, publisher, published_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, position, query, url, title, publisher, published_at, now, now)
+        )
+        return cursor.lastrowid
+
+    def set_resolved_url(self, article_id, resolved_url):
+        self.execute(
+            "UPDATE articles SET resolved_url = ?, updated_at = ? WHERE id = ?",
+            (resolved_url, time.time(), article_id)
+        )
+
+    def set_content(self, article_id, title, body):
+        self.execute(
+            "UPDATE articles SET title = ?, body = ?, content_hash = ?, updated_at = ? WHERE id = ?",
+            (title, body, self.content_hash(body), time.time(), article_id)
+        )
+
+    def set_summary(self, article_id, summary):
+        self.execute(
+            "UPDATE articles SET summary = ?, updated_at = ? WHERE id = ?",
+            (summary, time.time(), article_id)
+        )
+
+    def set_duplicate(self, article_id, duplicate_of):
+        self.execute(
+            "UPDATE articles SET duplicate_of = ?, updated_at = ? WHERE id = ?",
+            (duplicate_of, time.time(), article_id)
+        )
+
+    def alternate_sources(self, run_id, article_ids=None):
+        """
+        Return {article id: [URLs of its near-duplicates]} for a run, or only for
+        the given article ids.
+        """
+        sql = ("SELECT duplicate_of, COALESCE(resolved_url, url) AS url FROM articles "
+               "WHERE run_id = ? AND duplicate_of IS NOT NULL")
+        params = [run_id]
+        if article_ids is not None:
+            article_ids = list(article_ids)
+            sql += f" AND duplicate_of IN ({','.join('?' * len(article_ids))})"
+            params += article_ids
+        sources = {}
+        for row in self.query(sql + " ORDER BY position", params):
+            sources.setdefault(row['duplicate_of'], []).append(row['url'])
+        return sources
+
+    def articles(self, run_id, summarized_only=True):
+        """
+        Return the articles of a run as dicts, in the order their links were gathered.
+        """
+        sql = f"SELECT {', '.join(self.columns)} FROM articles WHERE run_id = ?"
+        if summarized_only:
+            sql += " AND summary IS NOT NULL"
+        return self.query(sql + " ORDER BY position", (run_id,))
+
+    def search_filter(self, run_id, search=None):
+        sql = "run_id = ? AND summary IS NOT NULL"
+        params = [run_id]
+        if search:
+            # Match search literally: escape LIKE wildcards with '!'
+            escaped = search.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+            pattern = '%' + escaped + '%'
+            sql += (" AND (title LIKE ? ESCAPE '!' OR summary LIKE ? ESCAPE '!'"
+                    " OR COALESCE(resolved_url, url) LIKE ? ESCAPE '!')")
+            params += [pattern] * 3
+        return sql, params
+
+    def count_articles(self, run_id, search=None):
+        """
+        Return the number of summarized articles of a run, optionally only those
+        whose title, summary or URL contains search.
+        """
+        where, params = self.search_filter(run_id, search)
+        return self.query(f"SELECT COUNT(*) AS count FROM articles WHERE {where}", params)[0]['count']
+
+    def page(self, run_id, offset=0, limit=25, search=None):
+        """
+        Return one page of the summarized articles of a run, in gathering order.
+        """
+        where, params = self.search_filter(run_id, search)
+        return self.query(
+            f"SELECT {', '.join(self.columns)} FROM articles WHERE {where} ORDER BY position LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+
+    def iter_articles(self, run_id, search=None, batch_size=500):
+        """
+        Yield the summarized articles of a run in gathering order, batch_size rows
+        at a time, so exports never hold a whole run in memory.
+        """
+        where, params = self.search_filter(run_id, search)
+        last_position = -1
+        while True:
+            rows = self.query(
+                f"SELECT {', '.join(self.columns)} FROM articles WHERE {where} AND position > ? "
+                f"ORDER BY position LIMIT ?",
+                params + [last_position, batch_size]
+            )
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            last_position = rows[-1]['position']
+
+    def get(self, article_id):
+        rows = self.query(f"SELECT {', '.join(self.columns)} FROM articles WHERE id = ?", (article_id,))
+        return rows[0] if rows else None
+
+    def find_by_url(self, url):
+        return self.query(
+            f"SELECT {', '.join(self.columns)} FROM articles WHERE url = ? OR resolved_url = ? ORDER BY created_at DESC",
+            (url, url)
+        )
+
+    def find_by_content_hash(self, content_hash):
+        return self.query(
+            f"SELECT {', '.join(self.columns)} FROM articles WHERE content_hash = ? ORDER BY created_at DESC",
+            (content_hash,)
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
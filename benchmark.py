@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import resource
+import socket
+import tempfile
+import time
+import summarizer
+from benchmarkServer import serve
+from googleNewsExtractor import NewsGatherer
+from linkResolver import HTTPLinkResolver
+from linkScraper import WebScraper
+from pipeline import NewsPipeline
+
+class StubTokenizer:
+    """
+    Whitespace tokenizer with the slice of the Hugging Face API ArticleSummarizer uses.
+    """
+    def __call__(self, texts, max_length=None, truncation=False, add_special_tokens=True):
+        input_ids = []
+        for text in texts:
+            ids = [len(word) for word in text.split()]
+            if add_special_tokens:
+                ids = [0] + ids + [2]
+            if truncation and max_length:
+                ids = ids[:max_length]
+            input_ids.append(ids)
+        return {'input_ids': input_ids}
+
+    def pad(self, encoded, return_tensors=None):
+        return {'input_ids': encoded['input_ids'], 'attention_mask': None}
+
+    def batch_decode(self, sequences, skip_special_tokens=True):
+        return [f"Stub summary of {len(sequence)} tokens." for sequence in sequences]
+
+class StubModel:
+    """
+    Stands in for model.generate, costing seconds_per_token of wall time per input token.
+    """
+    def __init__(self, seconds_per_token=0.0):
+        self.seconds_per_token = seconds_per_token
+
+    def generate(self, input_ids, attention_mask=None, **kwargs):
+        time.sleep(self.seconds_per_token * sum(len(ids) for ids in input_ids))
+        return [ids[:kwargs.get('max_length', 150)] for ids in input_ids]
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Benchmark server did not start on port {port}")
+
+def measure(results, stage, scale, items, function, *args):
+    start = time.perf_counter()
+    output = function(*args)
+    seconds = time.perf_counter() - start
+    results.append({
+        'stage': stage,
+        'scale': scale,
+        'items': items,
+        'seconds': round(seconds, 3),
+        'items_per_second': round(items / seconds, 1) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+    logging.info(f"{stage} x{scale}: {items} items in {seconds:.2f} s")
+    return output
+
+def run_scale(base_url, scale, links_per_page, model_name, workdir):
+    results = []
+    queries = [f"benchmark query {i}" for i in range(math.ceil(scale / links_per_page))]
+    links_file = os.path.join(workdir, f"links_{scale}.txt")
+
+    news_gatherer = NewsGatherer(queries, "anytime", scale, links_file, "US", "en",
+                                 max_concurrency=10, min_request_interval=0)
+    news_gatherer.base_url = base_url
+    measure(results, 'NewsGatherer', scale, scale, lambda: asyncio.run(news_gatherer.gather_and_save_news()))
+    with open(links_file) as file:
+        links = [line.strip() for line in file if line.strip()]
+
+    resolver = HTTPLinkResolver(selenium_fallback=False)
+    resolver.news_host = base_url.split('://', 1)[1]
+    urls = measure(results, 'HTTPLinkResolver', scale, len(links), resolver.resolve_list, links)
+
+    scraper = WebScraper(None)
+    pages = measure(results, 'WebScraper', scale, len(urls), lambda: asyncio.run(scraper.scrape_all(urls)))
+
+    article_summarizer = summarizer.ArticleSummarizer(model_name=model_name)
+    bodies = [article_summarizer.article_body(content) for _, content, removed in pages if content and not removed]
+    bodies = [body for body in bodies if body]
+    measure(results, 'ArticleSummarizer', scale, len(bodies), article_summarizer.summarize_batch, bodies)
+
+    # The same work end to end, with the stages overlapping
+    news_gatherer = NewsGatherer(queries, "anytime", scale, None, "US", "en", max_concurrency=10, min_request_interval=0)
+    news_gatherer.base_url = base_url
+    resolver = HTTPLinkResolver(selenium_fallback=False)
+    resolver.news_host = base_url.split('://', 1)[1]
+    news_pipeline = NewsPipeline(news_gatherer, resolver, WebScraper(None), article_summarizer)
+    measure(results, 'NewsPipeline', scale, scale, lambda: asyncio.run(news_pipeline.run()))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end throughput benchmark for the SENTINEL pipeline.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000], help="numbers of URLs to run")
+    parser.add_argument("--links-per-page", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=20, help="paragraphs per synthetic article")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before each article response")
+    parser.add_argument("--forbidden-rate", type=float, default=0.05, help="fraction of articles answering 403")
+    parser.add_argument("--model", default="stub",
+                        help="'stub' for a stubbed model, or a (tiny) Hugging Face checkpoint name")
+    parser.add_argument("--stub-seconds-per-token", type=float, default=0.0)
+    parser.add_argument("--json", help="write the results to this file as JSON")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+
+    if args.model == "stub":
+        summarizer.register_model("stub", StubTokenizer(), StubModel(args.stub_seconds_per_token))
+
+    port = free_port()
+    server = multiprocessing.Process(
+        target=serve, args=(port,), daemon=True,
+        kwargs={'links_per_page': args.links_per_page, 'paragraphs': args.paragraphs,
+                'latency': args.latency, 'forbidden_rate': args.forbidden_rate},
+    )
+    server.start()
+    try:
+        wait_for_port(port)
+        results = []
+        with tempfile.TemporaryDirectory() as workdir:
+            for scale in args.scales:
+                results.extend(run_scale(f"http://127.0.0.1:{port}", scale, args.links_per_page, args.model, workdir))
+    finally:
+        server.terminate()
+
+    print(f"{'stage':<20}{'scale':>7}{'items':>7}{'seconds':>10}{'items/s':>10}{'peak RSS MB':>13}")
+    for row in results:
+        print(f"{row['stage']:<20}{row['scale']:>7}{row['items']:>7}{row['seconds']:>10.3f}"
+              f"{row['items_per_second'] or 0:>10.1f}{row['peak_rss_mb']:>13.1f}")
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
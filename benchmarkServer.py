@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import hashlib
+import random
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+from aiohttp import web
+
+WORDS = ("the government said on monday that new rules would take effect next year after months of talks "
+         "between officials industry groups and researchers who warned about rising costs and delays in "
+         "several regions while analysts expect markets to react cautiously to the announcement").split()
+
+class NewsServer:
+    """
+    Local stand-in for Google News and the publishers behind it, for offline benchmarks.
+    Search pages are served for 127.0.0.1 and articles for localhost.
+    /search returns a results page with WwrzSb anchors to ./read/<id>, /rss/search
+    an RSS feed of the same stories linking to /rss/articles/<id>, both of which
+    redirect like /read/<id>. /read/<id> redirects to localhost/article/<id>, and /article/<id> serves a synthetic article
+    (with cookie banner, footer and related-stories boilerplate and an ETag) after a delay.
+    Inputs:
+    links_per_page : int, optional
+        The number of article links on every search page (default is 100).
+    paragraphs : int, optional
+        The number of body paragraphs per article (default is 20).
+    latency : float, optional
+        The delay in seconds before every article response (default is 0.05).
+    forbidden_rate : float, optional
+        The fraction of articles answered with 403 Forbidden (default is 0.05).
+    """
+    def __init__(self, links_per_page=100, paragraphs=20, latency=0.05, forbidden_rate=0.05):
+        self.links_per_page = links_per_page
+        self.paragraphs = paragraphs
+        self.latency = latency
+        self.forbidden_rate = forbidden_rate
+
+    @staticmethod
+    def article_id(query, index):
+        return hashlib.sha1(f"{query}:{index}".encode('utf-8')).hexdigest()[:20]
+
+    def is_forbidden(self, article_id):
+        return int(article_id, 16) % 1000 < self.forbidden_rate * 1000
+
+    async def search(self, request):
+        query = request.query.get('q', '')
+        anchors = '\n'.join(
+            f'<article><a class="JtKRv WwrzSb" href="./read/{self.article_id(query, i)}?hl=en">Story {i}</a></article>'
+            for i in range(self.links_per_page)
+        )
+        return web.Response(text=f"<html><body><main>{anchors}</main></body></html>", content_type='text/html')
+
+    async def rss_search(self, request):
+        query = request.query.get('q', '')
+        items = '\n'.join(
+            f"<item><title>Story {i} - Example News</title>"
+            f"<link>http://{request.host}/rss/articles/{self.article_id(query, i)}?oc=5</link>"
+            f"<pubDate>{formatdate(1700000000 - i * 3600, usegmt=True)}</pubDate>"
+            f'<source url="http://localhost:{request.url.port}">Example News</source></item>'
+            for i in range(self.links_per_page)
+        )
+        feed = f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>{escape(query)}</title>{items}</channel></rss>'
+        return web.Response(text=feed, content_type='application/rss+xml')
+
+    async def read(self, request):
+        # Articles live on a different host name than the search pages, like real publishers
+        raise web.HTTPFound(f"http://localhost:{request.url.port}/article/{request.match_info['article_id']}")
+
+    async def article(self, request):
+        article_id = request.match_info['article_id']
+        await asyncio.sleep(self.latency)
+        if self.is_forbidden(article_id):
+            return web.Response(status=403, text="Forbidden")
+        etag = f'"{article_id}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+
+        generator = random.Random(article_id)
+        body = '\n'.join(
+            f"<p>{' '.join(generator.choice(WORDS) for _ in range(60)).capitalize()}.</p>"
+            for _ in range(self.paragraphs)
+        )
+        page = f"""<html><head><title>Article {article_id}</title></head><body>
+            <nav><a href="/">Home</a></nav>
+            <div class="cookie-banner"><p>We use cookies to improve your experience on this website.</p></div>
+            <div class="article-body">{body}</div>
+            <div class="related-stories"><p><a href="/">Another story you might like to read today</a></p></div>
+            <footer><p>Copyright 2024 Example News. All rights reserved worldwide.</p></footer>
+            </body></html>"""
+        return web.Response(text=page, content_type='text/html', headers={'ETag': etag})
+
+    def app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get('/search', self.search),
+            web.get('/read/{article_id}', self.read),
+            web.get('/rss/search', self.rss_search),
+            web.get('/rss/articles/{article_id}', self.read),
+            web.get('/article/{article_id}', self.article),
+        ])
+        return app
+
+def serve(port, **options):
+    web.run_app(NewsServer(**options).app(), host='localhost', port=port, print=None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic Google News pages for offline benchmarks.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--links-per-page", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--forbidden-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    serve(args.port, links_per_page=args.links_per_page, paragraphs=args.paragraphs,
+          latency=args.latency, forbidden_rate=args.forbidden_rate)
@@ -0,0 +1,145 @@
+import atexit
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+GOOGLE_NEWS_HOST = 'news.google.com'
+
+class BrowserPool:
+    """
+    A bounded pool of warm headless Chrome drivers shared by the link resolver and the scraper.
+    Drivers are started on demand, handed back to the pool after each page and
+    reused, and replaced after max_pages_per_driver pages or when they crash.
+    Inputs:
+    max_drivers : int, optional
+        The maximum number of drivers alive at once (default is 5).
+    max_pages_per_driver : int, optional
+        The number of pages a driver loads before it is recycled (default is 50).
+    headless : bool, optional
+        Whether to run the browsers in headless mode (default is True).
+    page_load_timeout : float, optional
+        The page load timeout in seconds applied to every driver (default is 30).
+    """
+    def __init__(self, max_drivers=5, max_pages_per_driver=50, headless=True, page_load_timeout=30):
+        self.max_drivers = max_drivers
+        self.max_pages_per_driver = max_pages_per_driver
+        self.headless = headless
+        self.page_load_timeout = page_load_timeout
+        self.idle = queue.LifoQueue()  # most recently used drivers are the warmest
+        self.slots = threading.BoundedSemaphore(max_drivers)
+        self.page_counts = {}
+        self.lock = threading.Lock()
+        self.driver_path = None
+
+    def create_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service as ChromeService
+        from selenium.webdriver.chrome.options import Options
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        with self.lock:
+            # Download/locate chromedriver once per pool instead of once per driver
+            if self.driver_path is None:
+                self.driver_path = ChromeDriverManager().install()
+
+        options = Options()
+        if self.headless:
+            options.add_argument('--headless=new')
+        options.add_argument('--disable-notifications')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+        options.page_load_strategy = 'eager'
+        driver = webdriver.Chrome(service=ChromeService(self.driver_path), options=options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        return driver
+
+    @staticmethod
+    def is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def quit_driver(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.warning(f"Error quitting browser: {e}")
+
+    def checkout(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self.create_driver()
+
+    def checkin(self, driver):
+        with self.lock:
+            pages = self.page_counts.get(id(driver), 0) + 1
+            self.page_counts[id(driver)] = pages
+
+        if pages >= self.max_pages_per_driver or not self.is_alive(driver):
+            with self.lock:
+                self.page_counts.pop(id(driver), None)
+            self.quit_driver(driver)
+        else:
+            self.idle.put(driver)
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a driver for one page load. Blocks while max_drivers are in use.
+        """
+        self.slots.acquire()
+        driver = None
+        try:
+            driver = self.checkout()
+            yield driver
+        finally:
+            if driver is not None:
+                self.checkin(driver)
+            self.slots.release()
+
+    def close(self):
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.quit_driver(driver)
+        with self.lock:
+            self.page_counts.clear()
+
+def wait_until_off_host(driver, host=GOOGLE_NEWS_HOST, timeout=10):
+    """
+    Wait until the browser has navigated away from host and return its current URL.
+    Returns whatever URL the browser is on when the timeout expires.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: urlparse(d.current_url).netloc != host
+        )
+    except TimeoutException:
+        logging.warning(f"Timed out waiting to leave {host}")
+    return driver.current_url
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_shared_pool(**kwargs):
+    """
+    Return the process-wide BrowserPool, creating it with kwargs on first use.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = BrowserPool(**kwargs)
+            atexit.register(_shared_pool.close)
+        return _shared_pool
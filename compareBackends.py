@@ -0,0 +1,94 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import summarizer
+from benchmark import peak_rss_mb
+from summaryBackends import DECODING_PROFILES, ENGINES
+
+def run_engine(engine, model_name, profiles, bodies, batch_size, threads):
+    """
+    Load one engine and summarize bodies with every decoding profile. Runs in its
+    own process, so peak RSS is that of this engine alone.
+    """
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+    start = time.perf_counter()
+    summarizer.warm_up(model_name, engine)
+    load_seconds = time.perf_counter() - start
+    rss_after_load = peak_rss_mb()
+
+    rows = []
+    for profile in profiles:
+        article_summarizer = summarizer.ArticleSummarizer(batch_size=batch_size, model_name=model_name,
+                                                          engine=engine, decoding=profile)
+        start = time.perf_counter()
+        summaries = article_summarizer.summarize_batch(bodies)
+        seconds = time.perf_counter() - start
+        rows.append({
+            'engine': engine,
+            'model': article_summarizer.model_name,
+            'profile': profile,
+            'articles': len(bodies),
+            'load_seconds': round(load_seconds, 2),
+            'seconds': round(seconds, 3),
+            'ms_per_article': round(seconds * 1000 / len(bodies), 1) if bodies else None,
+            'load_rss_mb': round(rss_after_load, 1),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'summaries': summaries,
+        })
+    return rows
+
+def unigram_f1(summary, reference):
+    """
+    Cheap quality proxy: F1 of the word overlap between a summary and a reference summary.
+    """
+    words, reference_words = summary.lower().split(), reference.lower().split()
+    common = sum(min(words.count(word), reference_words.count(word)) for word in set(words))
+    if not common:
+        return 0.0
+    precision, recall = common / len(words), common / len(reference_words)
+    return 2 * precision * recall / (precision + recall)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare summarization engines and decoding profiles on the same articles.")
+    parser.add_argument("--input", default="Content.txt", help="scraped content file (default Content.txt)")
+    parser.add_argument("--limit", type=int, default=20, help="number of articles to summarize")
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--profiles", nargs="+", default=['fast greedy', 'deterministic'], choices=list(DECODING_PROFILES))
+    parser.add_argument("--model", help="checkpoint to use instead of each engine's default")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--threads", type=int, help="torch threads per engine process")
+    parser.add_argument("--json", help="write the results, summaries included, to this file as JSON")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+
+    bodies = summarizer.ArticleSummarizer.read_articles(args.input)[:args.limit]
+    results = []
+    for engine in args.engines:
+        # A fresh process per engine keeps the memory numbers separate
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            try:
+                results.extend(executor.submit(run_engine, engine, args.model, args.profiles, bodies,
+                                               args.batch_size, args.threads).result())
+            except Exception as e:
+                print(f"Skipping {engine}: {e}")
+
+    # Quality is reported relative to the first engine and profile
+    if results:
+        reference = results[0]['summaries']
+        for row in results:
+            scores = [unigram_f1(summary, ref) for summary, ref in zip(row['summaries'], reference)]
+            row['overlap_with_reference'] = round(sum(scores) / len(scores), 3) if scores else None
+
+    print(f"{'engine':<12}{'profile':<15}{'load s':>8}{'ms/article':>12}{'load RSS MB':>13}{'peak RSS MB':>13}{'overlap':>9}")
+    for row in results:
+        print(f"{row['engine']:<12}{row['profile']:<15}{row['load_seconds']:>8.2f}{row['ms_per_article'] or 0:>12.1f}"
+              f"{row['load_rss_mb']:>13.1f}{row['peak_rss_mb']:>13.1f}{row['overlap_with_reference'] or 0:>9.3f}")
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
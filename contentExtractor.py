@@ -0,0 +1,159 @@
+import logging
+import re
+import sys
+import time
+from collections import defaultdict
+import lxml.html
+from lxml import etree
+
+class ContentExtractor:
+    """
+    Extract the title and main article paragraphs from a page with lxml.
+    Scripts, styles and page chrome (nav, header, footer, aside, forms) are dropped
+    before the paragraphs are read. Paragraphs are then grouped by their parent
+    element and each group is scored on text length, link density and boilerplate
+    class/id names, so cookie banners, footers and "related stories" blocks do
+    not end up in the summary input.
+    Inputs:
+    min_paragraph_length : int, optional
+        Paragraphs shorter than this many characters are ignored (default is 30).
+    max_link_density : float, optional
+        Paragraphs whose text is mostly links are ignored (default is 0.5).
+    min_relative_score : float, optional
+        Paragraph groups scoring below this fraction of the best group are dropped (default is 0.25).
+    """
+    removed_tags = ['script', 'style', 'noscript', 'template', 'svg', 'iframe', 'nav', 'header', 'footer',
+                    'aside', 'form', 'button', 'select', 'figure']
+    boilerplate_pattern = re.compile(
+        r'cookie|consent|footer|related|recommend|newsletter|subscribe|promo|share|social|comment|sidebar|'
+        r'advert|sponsor|banner|breadcrumb|\bnav|menu|popup|modal|paywall|signup|more-stories|read-more',
+        re.I
+    )
+
+    def __init__(self, min_paragraph_length=30, max_link_density=0.5, min_relative_score=0.25):
+        self.min_paragraph_length = min_paragraph_length
+        self.max_link_density = max_link_density
+        self.min_relative_score = min_relative_score
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.split())
+
+    def is_boilerplate(self, element):
+        # Check the element and a few ancestors for boilerplate class/id names
+        for _ in range(4):
+            if element is None:
+                break
+            attributes = f"{element.get('class', '')} {element.get('id', '')}"
+            if attributes.strip() and self.boilerplate_pattern.search(attributes):
+                return True
+            element = element.getparent()
+        return False
+
+    def parse(self, html):
+        if not html:
+            return None
+        try:
+            try:
+                tree = lxml.html.fromstring(html)
+            except ValueError:
+                # lxml refuses str input that carries an XML encoding declaration
+                if not isinstance(html, str):
+                    raise
+                tree = lxml.html.fromstring(html.encode('utf-8'))
+        except (etree.ParserError, ValueError) as e:
+            logging.warning(f"Could not parse page: {e}")
+            return None
+        etree.strip_elements(tree, *self.removed_tags, with_tail=False)
+        return tree
+
+    def extract_title(self, tree):
+        for meta in tree.iterfind('.//meta[@property="og:title"]'):
+            content = meta.get('content')
+            if content:
+                return self.normalize(content)
+        title = tree.find('.//title')
+        if title is not None and title.text:
+            return self.normalize(title.text)
+        return 'No title found'
+
+    def extract(self, html):
+        """
+        Return (title, paragraphs) for a page, with paragraphs in document order.
+        """
+        tree = self.parse(html)
+        if tree is None:
+            return 'No title found', []
+
+        groups = defaultdict(list)
+        scores = defaultdict(float)
+        for position, paragraph in enumerate(tree.iter('p')):
+            text = self.normalize(paragraph.text_content())
+            if len(text) < self.min_paragraph_length:
+                continue
+            link_chars = sum(len(self.normalize(link.text_content())) for link in paragraph.iter('a'))
+            link_density = link_chars / len(text)
+            if link_density > self.max_link_density or self.is_boilerplate(paragraph):
+                continue
+
+            parent = paragraph.getparent()
+            groups[parent].append((position, text))
+            # Long prose with a sentence structure scores highest
+            scores[parent] += len(text) * (1 - link_density) + 25 * text.count('. ')
+
+        if not scores:
+            return self.extract_title(tree), []
+
+        best = max(scores.values())
+        kept = [item for parent, items in groups.items()
+                if scores[parent] >= best * self.min_relative_score
+                for item in items]
+        kept.sort()
+        return self.extract_title(tree), [text for _, text in kept]
+
+    @staticmethod
+    def format_article(title, paragraphs):
+        lines = [f'Title: {title}']
+        lines.extend(f'Text: {paragraph}' for paragraph in paragraphs)
+        return '\n'.join(lines) + '\n\n'
+
+def extract_legacy(html):
+    """
+    The previous extractor (BeautifulSoup with html.parser, every <p>), kept for timing comparisons.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    title = soup.find('title').text if soup.find('title') else 'No title found'
+    paragraphs = [p.text for p in soup.find_all('p')]
+
+    output = f'Title: {title}\n'
+    for paragraph in paragraphs:
+        output += f'Text: {paragraph}\n'
+    output += '\n'
+    return title, output
+
+#test run: python contentExtractor.py page1.html page2.html ...
+if __name__ == "__main__":
+    extractor = ContentExtractor()
+    total_legacy, total_new = 0.0, 0.0
+    for path in sys.argv[1:]:
+        with open(path, 'rb') as file:
+            html = file.read()
+
+        start = time.perf_counter()
+        _, legacy_output = extract_legacy(html)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        title, paragraphs = extractor.extract(html)
+        new_output = extractor.format_article(title, paragraphs)
+        new_seconds = time.perf_counter() - start
+
+        total_legacy += legacy_seconds
+        total_new += new_seconds
+        print(f"{path}: legacy {legacy_seconds * 1000:.1f} ms / {len(legacy_output)} chars, "
+              f"new {new_seconds * 1000:.1f} ms / {len(new_output)} chars")
+    if sys.argv[1:]:
+        print(f"Total: legacy {total_legacy:.3f} s, new {total_new:.3f} s")
@@ -0,0 +1,96 @@
+import re
+import zlib
+from collections import defaultdict
+import numpy as np
+
+class NearDuplicateDetector:
+    """
+    Detect near-duplicate articles (syndicated wire copy) with MinHash and LSH.
+    Each body is reduced to a set of word shingles, hashed into a MinHash signature
+    and indexed in LSH bands. Articles are added one at a time, so the detector can
+    sit in a streaming pipeline: add() returns the key of the first article whose
+    estimated Jaccard similarity with the new one reaches threshold.
+    Inputs:
+    threshold : float, optional
+        The estimated Jaccard similarity above which two bodies are duplicates (default is 0.8).
+    num_perm : int, optional
+        The number of MinHash permutations (default is 128).
+    bands : int, optional
+        The number of LSH bands; num_perm must be divisible by it (default is 16).
+    shingle_size : int, optional
+        The number of words per shingle (default is 5).
+    seed : int, optional
+        The seed for the permutation coefficients (default is 1).
+    """
+    prime = np.uint64(4294967311)  # smallest prime above 2**32
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        generator = np.random.default_rng(seed)
+        self.a = generator.integers(1, 2 ** 31, size=(num_perm, 1), dtype=np.uint64)
+        self.b = generator.integers(0, 2 ** 32, size=(num_perm, 1), dtype=np.uint64)
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+        self.signatures = {}
+        self.order = {}
+        self.representative = {}
+        self.groups = {}
+
+    def shingles(self, text):
+        words = re.findall(r'\w+', text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        return {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in self.shingles(text)), dtype=np.uint64
+        )
+        # One row per permutation: (a * h + b) mod p, minimised over all shingles
+        return ((self.a * hashes + self.b) % self.prime).min(axis=1)
+
+    def band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def similarity(self, first, second):
+        return float(np.mean(self.signatures[first] == self.signatures[second]))
+
+    def add(self, key, text):
+        """
+        Index text under key and return the key of the group representative, which
+        is key itself unless a near-duplicate has been added before.
+        """
+        signature = self.signature(text)
+        self.signatures[key] = signature
+        band_keys = self.band_keys(signature)
+
+        candidates = {other for band, band_key in enumerate(band_keys)
+                      for other in self.buckets[band].get(band_key, ())}
+        matches = {self.representative[other] for other in candidates
+                   if self.similarity(key, other) >= self.threshold}
+        representative = min(matches, key=self.order.get) if matches else key
+
+        for band, band_key in enumerate(band_keys):
+            self.buckets[band][band_key].append(key)
+        self.order[key] = len(self.order)
+        self.representative[key] = representative
+        self.groups.setdefault(representative, []).append(key)
+        return representative
+
+    def duplicate_groups(self):
+        """
+        Return {representative: [other keys]} for every group with more than one member.
+        """
+        return {representative: members[1:]
+                for representative, members in self.groups.items() if len(members) > 1}
+
+def group_duplicates(texts, **kwargs):
+    """
+    Return the index of the representative for each text in texts.
+    """
+    detector = NearDuplicateDetector(**kwargs)
+    return [detector.add(i, text) for i, text in enumerate(texts)]
@@ -0,0 +1,222 @@
+import logging
+import re
+import time
+import numpy as np
+from scipy import sparse
+from metrics import default_metrics
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+herself him himself his how i if in into is it its itself just me more most my myself no nor not now of off on
+once only or other our ours ourselves out over own said same she should so some such than that the their theirs
+them themselves then there these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+class ExtractiveSummarizer:
+    """
+    Summarize articles by picking their most salient sentences, in seconds and without a model.
+    Sentences are weighted with TF-IDF, where the document frequencies cover every
+    article this summarizer has seen so far in the run. Each sentence is scored by its
+    centrality or TextRank within its own article. The scoring uses sparse matrix
+    products over all articles of a batch at once.
+    Has the same summarize_batch / article_body / batch_size interface as
+    ArticleSummarizer, so it can be used in NewsPipeline directly, and condense()
+    serves as an extractive pre-filter for ArticleSummarizer (hybrid mode).
+    Inputs:
+    num_sentences : int, optional
+        The number of sentences in an extractive summary (default is 3).
+    method : str, optional
+        'textrank' for PageRank over the sentence similarity graph or 'centrality'
+        for the summed similarity to all other sentences (default is 'textrank').
+    batch_size : int, optional
+        The number of articles NewsPipeline hands over at once (default is 32).
+    damping : float, optional
+        The TextRank damping factor (default is 0.85).
+    min_sentence_words : int, optional
+        Shorter sentences (captions, bylines) are ranked after all longer ones (default is 5).
+    max_iterations, tolerance : optional
+        The TextRank power iteration stops after max_iterations rounds or once the
+        scores change by less than tolerance (defaults are 50 and 1e-6).
+    metrics : Metrics, optional
+        The registry timings and counts are recorded in (default is metrics.default_metrics).
+    """
+    sentence_pattern = re.compile(r'(?<=[.!?])["”\')\]]?\s+(?=["“\'(\[]?[A-Z0-9])')
+    word_pattern = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+
+    def __init__(self, num_sentences=3, method='textrank', batch_size=32, damping=0.85, min_sentence_words=5,
+                 max_iterations=50, tolerance=1e-6, metrics=None):
+        if method not in ('textrank', 'centrality'):
+            raise ValueError(f"Unknown scoring method {method!r}, expected 'textrank' or 'centrality'")
+        self.num_sentences = num_sentences
+        self.method = method
+        self.batch_size = batch_size
+        self.damping = damping
+        self.min_sentence_words = min_sentence_words
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.metrics = metrics or default_metrics
+        self.vocabulary = {}
+        self.document_frequency = np.zeros(0)
+        self.document_count = 0
+
+    @staticmethod
+    def article_body(article):
+        from summarizer import ArticleSummarizer
+        return ArticleSummarizer.article_body(article)
+
+    def split_sentences(self, text):
+        return [sentence.strip() for sentence in self.sentence_pattern.split(text) if sentence.strip()]
+
+    def tokenize(self, sentence):
+        return [word for word in self.word_pattern.findall(sentence.lower()) if word not in STOPWORDS]
+
+    def fit(self, documents):
+        """
+        Add the words of documents (lists of tokenized sentences) to the run's
+        vocabulary and document frequencies.
+        """
+        for sentences in documents:
+            for word in {word for words in sentences for word in words}:
+                if word not in self.vocabulary:
+                    self.vocabulary[word] = len(self.vocabulary)
+        if len(self.vocabulary) > len(self.document_frequency):
+            self.document_frequency = np.concatenate(
+                [self.document_frequency, np.zeros(len(self.vocabulary) - len(self.document_frequency))]
+            )
+        for sentences in documents:
+            columns = list({self.vocabulary[word] for words in sentences for word in words})
+            self.document_frequency[columns] += 1
+        self.document_count += len(documents)
+
+    def tfidf_matrix(self, documents):
+        """
+        Return the L2-normalised sentence x word TF-IDF matrix of all sentences of documents.
+        """
+        rows, columns = [], []
+        row = 0
+        for sentences in documents:
+            for words in sentences:
+                rows.extend([row] * len(words))
+                columns.extend(self.vocabulary[word] for word in words)
+                row += 1
+        counts = sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(row, len(self.vocabulary)))
+        counts.sum_duplicates()
+        idf = np.log((1 + self.document_count) / (1 + self.document_frequency)) + 1
+        tfidf = counts.multiply(idf).tocsr()
+        norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ tfidf
+
+    def score(self, documents):
+        """
+        Score every sentence of documents, returning one array of scores per document.
+        All documents are scored together on a block-diagonal similarity matrix, so
+        sentences are only compared with sentences of the same article.
+        """
+        sizes = [len(sentences) for sentences in documents]
+        if not sum(sizes):
+            return [np.zeros(0) for _ in documents]
+        tfidf = self.tfidf_matrix(documents)
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        similarity = sparse.block_diag(
+            [tfidf[bounds[i]:bounds[i + 1]] @ tfidf[bounds[i]:bounds[i + 1]].T for i in range(len(sizes))],
+            format='csr',
+        )
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+        weights = np.asarray(similarity.sum(axis=1)).ravel()
+
+        if self.method == 'centrality':
+            scores = weights
+        else:
+            teleport = 1.0 / np.repeat(np.maximum(sizes, 1), sizes)
+            transition = (sparse.diags(1 / np.where(weights > 0, weights, 1)) @ similarity).T.tocsr()
+            scores = teleport.copy()
+            for _ in range(self.max_iterations):
+                updated = (1 - self.damping) * teleport + self.damping * (transition @ scores)
+                converged = np.abs(updated - scores).sum() < self.tolerance
+                scores = updated
+                if converged:
+                    break
+        return np.split(scores, np.cumsum(sizes)[:-1])
+
+    def rank(self, texts):
+        """
+        Return, for every text, its sentences and their indices ordered from most to least salient.
+        """
+        sentences = [self.split_sentences(text or '') for text in texts]
+        tokens = [[self.tokenize(sentence) for sentence in article] for article in sentences]
+        self.fit(tokens)
+        rankings = []
+        for article, scores in zip(sentences, self.score(tokens)):
+            # Sentences too short to stand on their own go to the back of the ranking
+            eligible = np.array([len(sentence.split()) >= self.min_sentence_words for sentence in article], dtype=bool)
+            order = np.lexsort((-scores, ~eligible)) if len(article) else np.array([], dtype=int)
+            rankings.append(order)
+        return sentences, rankings
+
+    def summarize_batch(self, texts):
+        """
+        Return an extractive summary of every text: its num_sentences most salient
+        sentences in their original order.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        start = time.perf_counter()
+        sentences, rankings = self.rank(texts)
+        summaries = [
+            ' '.join(article[i] for i in sorted(order[:self.num_sentences]))
+            for article, order in zip(sentences, rankings)
+        ]
+        self.metrics.observe('summarize.extract_seconds', time.perf_counter() - start)
+        self.metrics.increment('summarize.articles', len(texts))
+        return summaries
+
+    def condense(self, texts, budget, measure=None):
+        """
+        Shorten every text longer than budget to its most salient sentences that fit
+        in budget, kept in their original order. measure maps a list of sentences to
+        their lengths (default is word counts); texts that already fit are returned unchanged.
+        When not even one sentence fits (e.g. text without sentence punctuation), the
+        most salient sentence is cut down to the budget instead.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        measure = measure or (lambda sentences: [len(sentence.split()) for sentence in sentences])
+        sentences, rankings = self.rank(texts)
+        condensed = []
+        for text, article, order in zip(texts, sentences, rankings):
+            lengths = measure(article) if article else []
+            if sum(lengths) <= budget:
+                condensed.append(text)
+                continue
+            chosen, used = [], 0
+            for i in order:
+                if used + lengths[i] <= budget:
+                    chosen.append(i)
+                    used += lengths[i]
+            if chosen:
+                condensed.append(' '.join(article[i] for i in sorted(chosen)))
+            else:
+                top = order[0]
+                words = article[top].split()
+                condensed.append(' '.join(words[:max(1, len(words) * budget // lengths[top])]))
+            self.metrics.increment('summarize.condensed')
+            logging.info(f"Condensed an article from {len(article)} to {len(chosen)} sentences")
+        return condensed
+
+#test run
+if __name__ == "__main__":
+    import sys
+    from summarizer import ArticleSummarizer
+    start = time.time()
+    input_file = sys.argv[1] if len(sys.argv) > 1 else "Content.txt"
+    bodies = ArticleSummarizer.read_articles(input_file)
+    for i, summary in enumerate(ExtractiveSummarizer().summarize_batch(bodies), start=1):
+        print(f"Article {i} Summary:\n{summary}\n")
+    end = time.time()
+    print(f"Total time taken: {end - start:.2f} seconds")
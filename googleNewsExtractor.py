@@ -2,18 +2,64 @@ import random
 import aiohttp
 import asyncio
 import logging
+import math
 import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode, urlparse
 from bs4 import BeautifulSoup
+from metrics import default_metrics
+
+class HostRateLimiter:
+    """
+    Space out requests to the same host by at least min_interval seconds.
+    Requests to different hosts are not delayed by each other.
+    """
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.next_slot = {}
+        self.lock = asyncio.Lock()
+
+    async def wait(self, url):
+        host = urlparse(url).netloc
+        loop = asyncio.get_running_loop()
+        async with self.lock:
+            now = loop.time()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
 
 class NewsGatherer:
-    def __init__(self, search_queries, date_of_news, total_number_of_urls, output_file, location, language):
-        self.search_queries = search_queries
+    """
+    Collect Google News article links for a list of search queries.
+    All queries are fetched concurrently over one pooled aiohttp session.
+    Inputs:
+    max_concurrency : int, optional
+        The maximum number of search pages fetched at once (default is 5).
+    min_request_interval : float, optional
+        The minimum number of seconds between two requests to the same host (default is 1.0).
+    metrics : Metrics, optional
+        The registry fetch counts and timings are recorded in (default is metrics.default_metrics).
+    http_cache : HTTPCache, optional
+        A response cache search pages are served from and revalidated against (default is None).
+    """
+    base_url = "https://news.google.com"
+
+    def __init__(self, search_queries, date_of_news, total_number_of_urls, output_file, location, language,
+                 max_concurrency=5, min_request_interval=1.0, metrics=None, http_cache=None):
+        self.search_queries = [query.strip() for query in search_queries if query.strip()]
         self.date_of_news = date_of_news
         self.total_number_of_urls = total_number_of_urls
-        self.number_of_urls_per_query = total_number_of_urls // len(search_queries)
+        self.number_of_urls_per_query = max(1, math.ceil(total_number_of_urls / max(1, len(self.search_queries))))
         self.output_file = output_file
         self.location = location
         self.language = language
+        self.max_concurrency = max_concurrency
+        self.min_request_interval = min_request_interval
+        self.semaphore = None
+        self.rate_limiter = None
+        self.metrics = metrics or default_metrics
+        self.http_cache = http_cache
         
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
@@ -26,14 +72,54 @@ class NewsGatherer:
         User agents are a list of different strings representing various web browsers and operating systems. These strings are used in the NewsGatherer class to mimic different user agents when making HTTP requests. User agents help websites identify the browser and operating system of the client making the request.
         '''
 
+    @asynccontextmanager
+    async def open_session(self):
+        """
+        Open a pooled session shared by every query, together with the
+        concurrency and per-host rate limits that apply to it.
+        """
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.rate_limiter = HostRateLimiter(self.min_request_interval)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            yield session
+
     async def fetch(self, session, url):
         headers = {'User-Agent': random.choice(self.user_agents)}
+        if self.http_cache is not None:
+            return await self.fetch_cached(session, url, headers)
+        try:
+            async with self.semaphore:
+                await self.rate_limiter.wait(url)
+                with self.metrics.timer('gather.fetch_seconds'):
+                    async with session.get(url, headers=headers) as response:
+                        response.raise_for_status()
+                        page = await response.text()
+            self.metrics.increment('gather.pages_fetched')
+            return page
+        except aiohttp.ClientError as e:
+            logging.error(f"Request failed: {e}")
+            self.metrics.increment('gather.fetch_errors')
+            return ""
+
+    async def fetch_cached(self, session, url, headers):
         try:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                return await response.text()
+            async with self.semaphore:
+                # Fresh cache entries need no request, so they skip the rate limit too
+                if not self.http_cache.is_fresh(url):
+                    await self.rate_limiter.wait(url)
+                with self.metrics.timer('gather.fetch_seconds'):
+                    _, status, body = await self.http_cache.fetch(session, url, 'search', headers,
+                                                                  metrics=self.metrics)
+            if status >= 400:
+                logging.error(f"Request failed: HTTP {status} for {url}")
+                self.metrics.increment('gather.fetch_errors')
+                return ""
+            self.metrics.increment('gather.pages_fetched')
+            return body.decode('utf-8', errors='replace')
         except aiohttp.ClientError as e:
             logging.error(f"Request failed: {e}")
+            self.metrics.increment('gather.fetch_errors')
             return ""
 
     '''
@@ -45,40 +131,81 @@ class NewsGatherer:
             if 'WwrzSb' in a_tag.get('class', []):  # Check if class contains 'WwrzSb'(change it in future if the code stops working)
                 href = a_tag['href']
                 if href.startswith('./read'):
-                    full_url = "https://news.google.com" + href[1:]
+                    full_url = self.base_url + href[1:]
                     links.add(full_url)
         return list(links)
 
-    async def gather_news_links(self, search_query):
-        if self.date_of_news.lower() == "anytime":
-            url = f"https://news.google.com/search?q={search_query}&hl={self.language}&gl={self.location}&ceid={self.location}%3A{self.language}"
-        else:
-            search_query_with_date = f"{search_query} when:{self.date_of_news}"
-            url = f"https://news.google.com/search?q={search_query_with_date}&hl={self.language}&gl={self.location}&ceid={self.location}%3A{self.language}"
+    def parse_search_page(self, response_text):
+        return self.extract_news_links(BeautifulSoup(response_text, 'html.parser'))
+
+    def build_search_url(self, search_query):
+        if self.date_of_news.lower() != "anytime":
+            search_query = f"{search_query} when:{self.date_of_news}"
+        params = {
+            'q': search_query,
+            'hl': self.language,
+            'gl': self.location,
+            'ceid': f"{self.location}:{self.language}",
+        }
+        return f"{self.base_url}/search?{urlencode(params)}"
+
+    async def gather_news_links(self, search_query, session=None):
+        if session is None:
+            async with self.open_session() as session:
+                return await self.gather_news_links(search_query, session)
 
-        async with aiohttp.ClientSession() as session:
-            response_text = await self.fetch(session, url)
-            if not response_text:
-                return []
+        response_text = await self.fetch(session, self.build_search_url(search_query))
+        if not response_text:
+            return []
 
-            soup = BeautifulSoup(response_text, 'html.parser')
-            links = self.extract_news_links(soup)  # Use the new method to extract links
-            links = links[:self.number_of_urls_per_query]  # Limit links to desired number per query
+        # Parsing is CPU-bound, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        links = await loop.run_in_executor(None, self.metrics.profiled('gather', self.parse_search_page), response_text)
+        return links[:self.number_of_urls_per_query]  # Limit links to desired number per query
 
-            # Introduce a random delay to mimic human behavior and avoid rate-limiting
-            await asyncio.sleep(random.uniform(1, 3))
-            
-            return links
+    def link_metadata(self, link):
+        """
+        Return what is known about link before it is scraped (title, publisher, published_at).
+        Search pages carry nothing usable, so this is empty here.
+        """
+        return {}
+
+    async def gather_query_links(self, search_query, session):
+        return search_query, await self.gather_news_links(search_query, session)
+
+    async def iter_news_links(self, is_new=None):
+        """
+        Yield unique (query, link) pairs as soon as each query's search page has been
+        parsed, stopping once total_number_of_urls links have been produced.
+        Links for which is_new(link) is false are skipped and not counted.
+        """
+        seen = set()
+        produced = 0
+        async with self.open_session() as session:
+            tasks = [asyncio.create_task(self.gather_query_links(query, session)) for query in self.search_queries]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    query, links = await next_done
+                    for link in links:
+                        if link in seen:
+                            continue
+                        seen.add(link)
+                        if is_new is not None and not is_new(link):
+                            continue
+                        self.metrics.increment('gather.links')
+                        yield query, link
+                        produced += 1
+                        if produced >= self.total_number_of_urls:
+                            return
+            finally:
+                # Stop the queries still in flight once enough links have been collected
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
 
     async def gather_and_save_news(self):
-        all_links = set()
-        for query in self.search_queries:
-            links = await self.gather_news_links(query)
-            all_links.update(links)
-            if len(all_links) >= self.total_number_of_urls:
-                break
-        
-        all_links = list(all_links)[:self.total_number_of_urls]  # Limit total links to desired number
+        with self.metrics.stage('gather'):
+            all_links = [link async for _, link in self.iter_news_links()]
         with open(self.output_file, "w") as file:
             for link in all_links:
                 file.write(link + "\n")
@@ -0,0 +1,153 @@
+import sqlite3
+import threading
+import time
+import zlib
+from metrics import default_metrics
+
+class HTTPCache:
+    """
+    Persistent HTTP response cache shared by the news gatherer and the scraper, backed by SQLite.
+    Bodies of successful responses are stored zlib-compressed together with their
+    ETag and Last-Modified validators. A fresh entry is served from disk without a
+    request; a stale one is revalidated with If-None-Match / If-Modified-Since and
+    only downloaded again if the server says it changed.
+    Inputs:
+    path : str, optional
+        The file path of the cache database (default is http_cache.sqlite3).
+    max_bytes : int, optional
+        The maximum total size of the compressed bodies; the least recently used
+        entries are evicted beyond this (default is 256 MB).
+    ttls : dict, optional
+        Seconds an entry stays fresh per kind of resource (default is 15 minutes
+        for 'search' pages and 7 days for 'article' pages).
+    """
+    default_ttls = {'search': 15 * 60, 'article': 7 * 86400}
+
+    def __init__(self, path='http_cache.sqlite3', max_bytes=256 * 1024 * 1024, ttls=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**self.default_ttls, **(ttls or {})}
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, final_url TEXT NOT NULL, status INTEGER NOT NULL, body BLOB NOT NULL, "
+                "etag TEXT, last_modified TEXT, expires_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "size INTEGER NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def is_fresh(self, url):
+        with self.lock:
+            row = self.connection.execute("SELECT expires_at FROM responses WHERE url = ?", (url,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def lookup(self, url):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT final_url, status, body, etag, last_modified, expires_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.connection:
+                self.connection.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        final_url, status, body, etag, last_modified, expires_at = row
+        return {
+            'final_url': final_url, 'status': status, 'body': zlib.decompress(body),
+            'etag': etag, 'last_modified': last_modified, 'expires_at': expires_at,
+        }
+
+    def store(self, url, final_url, status, body, etag, last_modified, kind):
+        compressed = zlib.compress(body)
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, final_url, status, body, etag, last_modified, expires_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, final_url, status, compressed, etag, last_modified, now + self.ttls[kind], now, len(compressed))
+            )
+            self.evict()
+
+    def refresh(self, url, kind):
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE responses SET expires_at = ? WHERE url = ?", (time.time() + self.ttls[kind], url))
+
+    def evict(self):
+        self.connection.execute(
+            "DELETE FROM responses WHERE url IN (SELECT url FROM "
+            "(SELECT url, SUM(size) OVER (ORDER BY accessed_at DESC, url) AS running FROM responses) "
+            "WHERE running > ?)",
+            (self.max_bytes,)
+        )
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def should_store(self, status, headers):
+        return status == 200 and 'no-store' not in headers.get('Cache-Control', '').lower()
+
+    async def fetch(self, session, url, kind, headers=None, read=None, metrics=None):
+        """
+        GET url through the cache with an aiohttp session and return (final_url, status, body).
+        read is an optional coroutine function turning the response into the body
+        bytes (default is response.read()).
+        """
+        metrics = metrics or default_metrics
+        entry = self.lookup(url)
+        if entry and entry['expires_at'] > time.time():
+            metrics.increment('http_cache.hits')
+            return entry['final_url'], entry['status'], entry['body']
+
+        request_headers = {**(headers or {}), **self.conditional_headers(entry)}
+        async with session.get(url, headers=request_headers, allow_redirects=True) as response:
+            if response.status == 304 and entry:
+                self.refresh(url, kind)
+                metrics.increment('http_cache.revalidated')
+                return entry['final_url'], entry['status'], entry['body']
+            body = await read(response) if read else await response.read()
+            final_url = str(response.url)
+            if self.should_store(response.status, response.headers):
+                self.store(url, final_url, response.status, body, response.headers.get('ETag'),
+                           response.headers.get('Last-Modified'), kind)
+        metrics.increment('http_cache.misses')
+        return final_url, response.status, body
+
+    def fetch_sync(self, url, kind, headers=None, metrics=None):
+        """
+        Same as fetch, with requests instead of aiohttp.
+        """
+        import requests
+        metrics = metrics or default_metrics
+        entry = self.lookup(url)
+        if entry and entry['expires_at'] > time.time():
+            metrics.increment('http_cache.hits')
+            return entry['final_url'], entry['status'], entry['body']
+
+        response = requests.get(url, headers={**(headers or {}), **self.conditional_headers(entry)}, allow_redirects=True)
+        if response.status_code == 304 and entry:
+            self.refresh(url, kind)
+            metrics.increment('http_cache.revalidated')
+            return entry['final_url'], entry['status'], entry['body']
+        if self.should_store(response.status_code, response.headers):
+            self.store(url, response.url, response.status_code, response.content, response.headers.get('ETag'),
+                       response.headers.get('Last-Modified'), kind)
+        metrics.increment('http_cache.misses')
+        return response.url, response.status_code, response.content
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'entries': entries, 'bytes': size}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
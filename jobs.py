@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from metrics import Metrics
+
+class Job:
+    """
+    One analysis run executed in the background. Results go to the article store
+    under the job's own run_id, and a light copy of every summarized article is
+    kept in partial_results so the UI can show it while the job is still running.
+    """
+    def __init__(self, key, params, metrics):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.metrics = metrics
+        self.status = 'queued'
+        self.run_id = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.subscribers = 1
+        self.lock = threading.Lock()
+        self.partial_results = []
+
+    @property
+    def in_flight(self):
+        return self.status in ('queued', 'running')
+
+    def add_result(self, article):
+        with self.lock:
+            self.partial_results.append({
+                'title': article['title'],
+                'url': article['url'],
+                'summary': article['summary'],
+            })
+
+    def results(self):
+        with self.lock:
+            return list(self.partial_results)
+
+    def snapshot(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'run_id': self.run_id,
+            'error': self.error,
+            'results': len(self.partial_results),
+            'subscribers': self.subscribers,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+class JobManager:
+    """
+    Run analyses on a pool of background threads, so the Streamlit script never
+    blocks on a pipeline, and coalesce identical requests into one job.
+    Two requests are identical when all their parameters (queries, date range,
+    location, language, URL count and summarization settings) match; a request
+    identical to a queued or running job is attached to that job instead of
+    starting another one. Each job writes to its own run_id in the store, so
+    concurrent jobs never see each other's articles.
+    Inputs:
+    build_pipeline : callable
+        build_pipeline(params, metrics) returns the NewsPipeline for a job.
+    max_workers : int, optional
+        The number of jobs run at once; more are queued (default is 2).
+    keep_finished : float, optional
+        The number of seconds finished jobs stay available for polling (default is 3600).
+    """
+    def __init__(self, build_pipeline, max_workers=2, keep_finished=3600):
+        self.build_pipeline = build_pipeline
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sentinel-job')
+        self.keep_finished = keep_finished
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    @staticmethod
+    def make_key(params):
+        normalized = dict(params)
+        normalized['search_queries'] = sorted({query.strip().lower() for query in params['search_queries']})
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def submit(self, params, profiler=None):
+        """
+        Start a job for params, or return the in-flight job for identical params.
+        """
+        key = self.make_key(params)
+        with self.lock:
+            self.prune()
+            for job in self.jobs.values():
+                if job.key == key and job.in_flight:
+                    job.subscribers += 1
+                    logging.info(f"Coalesced request into job {job.id} ({job.subscribers} subscribers)")
+                    return job
+            job = Job(key, params, Metrics(profiler=profiler))
+            self.jobs[job.id] = job
+        self.executor.submit(self.run_job, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def prune(self):
+        cutoff = time.time() - self.keep_finished
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def run_job(self, job):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            pipeline = self.build_pipeline(job.params, job.metrics)
+            job.run_id = pipeline.run_id
+
+            async def consume():
+                async for article in pipeline.stream():
+                    job.add_result(article)
+
+            asyncio.run(consume())
+            job.status = 'done'
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,36 +1,93 @@
+import asyncio
+import base64
+import binascii
+import html
+import json
+import os
+import re
+import threading
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import asynccontextmanager
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse
+import aiohttp
 from tqdm import tqdm
 import logging
+from browserPool import GOOGLE_NEWS_HOST, get_shared_pool, wait_until_off_host
+from metrics import default_metrics
+
+_cache_file_lock = threading.Lock()
+
+def read_varint(data, pos):
+    result, shift = 0, 0
+    while pos < len(data):
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+    raise ValueError("Truncated varint")
+
+def decode_google_news_url(url):
+    """
+    Return the article URL embedded in a news.google.com/read or /articles link,
+    or None if the link does not carry it (newer links only hold an opaque id).
+    The id is a base64url-encoded protobuf whose string field holds the URL.
+    """
+    parsed = urlparse(url)
+    parts = parsed.path.rstrip('/').split('/')
+    if parsed.netloc != GOOGLE_NEWS_HOST or len(parts) < 2 or parts[-2] not in ('read', 'articles'):
+        return None
+
+    encoded = parts[-1]
+    try:
+        data = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+    except (ValueError, binascii.Error):
+        return None
+
+    prefix = b'\x08\x13\x22'
+    if data.startswith(prefix):
+        try:
+            length, pos = read_varint(data, len(prefix))
+            candidate = data[pos:pos + length].decode('utf-8')
+            if candidate.startswith(('http://', 'https://')):
+                return candidate
+        except (ValueError, UnicodeDecodeError):
+            pass
+
+    match = re.search(rb'https?://[\x21-\x7e]+', data)
+    return match.group(0).decode('ascii') if match else None
 
 class SeleniumLinkResolver:
     """
     Resolve final URLs of links that may have redirects using Selenium.
+    Drivers come from a BrowserPool, so browsers stay warm across batches and runs.
     Inputs:
     headless : bool, optional
         Whether to run the browser in headless mode (default is True).
+    pool : BrowserPool, optional
+        The pool to borrow drivers from (default is the process-wide shared pool).
+    redirect_timeout : float, optional
+        The number of seconds to wait for a link to leave news.google.com (default is 10).
+    metrics : Metrics, optional
+        The registry resolution counts are recorded in (default is metrics.default_metrics).
     """
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, pool=None, redirect_timeout=10, metrics=None):
         self.headless = headless
+        self.pool = pool
+        self.redirect_timeout = redirect_timeout
+        self.metrics = metrics or default_metrics
 
-    def initialize_driver(self):
-        options = Options()
-        if self.headless:
-            options.headless = True
-        options.add_argument('--disable-notifications')
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        return driver
+    def get_pool(self, max_workers=5):
+        if self.pool is None:
+            self.pool = get_shared_pool(max_drivers=max_workers, headless=self.headless)
+        return self.pool
 
     def get_final_url_selenium(self, driver, url):
         try:
             driver.get(url)
-            time.sleep(2)
-            return driver.current_url
+            return wait_until_off_host(driver, timeout=self.redirect_timeout)
         except Exception as e:
             logging.error(f"Error resolving URL {url}: {e}")
             return None
@@ -38,19 +95,40 @@ class SeleniumLinkResolver:
     def process_link(self, link, driver):
         link = link.strip()
         if link:
-            final_url = self.get_final_url_selenium(driver, link)
+            with self.metrics.timer('resolve.selenium_seconds'):
+                final_url = self.get_final_url_selenium(driver, link)
+            self.metrics.increment('resolve.selenium_resolved' if final_url and final_url != link else 'resolve.failed')
             return link, final_url if final_url and final_url != link else None
         return link, None
 
     def process_links_in_batch(self, links):
-        driver = self.initialize_driver()
+        pool = self.get_pool()
         results = []
         for link in links:
-            original_link, final_url = self.process_link(link, driver)
-            results.append((original_link, final_url))
-        driver.quit()
+            with pool.driver() as driver:
+                results.append(self.process_link(link, driver))
         return results
 
+    def resolve_list(self, links, max_workers=5, batch_size=10):
+        """
+        Resolve a list of links, returning the final URLs in input order.
+        Links that could not be resolved are returned unchanged.
+        """
+        links = [link.strip() for link in links]
+        self.get_pool(max_workers)
+        resolved_links = [None] * len(links)
+        batches = [(i, links[i:i + batch_size]) for i in range(0, len(links), batch_size)]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.process_links_in_batch, batch[1]): batch[0] for batch in batches}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Resolving Links"):
+                start_idx = futures[future]
+                batch_results = future.result()
+                for i, result in enumerate(batch_results):
+                    original_link, final_url = result
+                    resolved_links[start_idx + i] = final_url if final_url else original_link
+        return resolved_links
+
     def resolve_links(self, input_file, output_file, max_workers=5, batch_size=10):
         """
         Resolve the final URLs of links from an input file and save them to an output file.
@@ -67,17 +145,176 @@ class SeleniumLinkResolver:
         with open(input_file, 'r') as file:
             links = [link.strip() for link in file.readlines()]
 
-        resolved_links = [None] * len(links)
-        batches = [(i, links[i:i + batch_size]) for i in range(0, len(links), batch_size)]
+        with self.metrics.stage('resolve'):
+            resolved_links = self.resolve_list(links, max_workers, batch_size)
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(self.process_links_in_batch, batch[1]): batch[0] for batch in batches}
-            for future in tqdm(as_completed(futures), total=len(futures), desc="Resolving Links"):
-                start_idx = futures[future]
-                batch_results = future.result()
-                for i, result in enumerate(batch_results):
-                    original_link, final_url = result
-                    resolved_links[start_idx + i] = final_url if final_url else original_link
+        with open(output_file, 'w') as file:
+            for resolved_link in resolved_links:
+                file.write(resolved_link + '\n')
+
+        logging.info(f"Resolved links have been written to {output_file}")
+
+class HTTPLinkResolver:
+    """
+    Resolve Google News links to article URLs without starting a browser.
+    Each link is first decoded locally when the URL encodes its target, then
+    resolved by following HTTP redirects and meta-refresh / data-n-au hints.
+    Links that still cannot be resolved are handed to SeleniumLinkResolver.
+    Inputs:
+    max_concurrency : int, optional
+        The maximum number of links resolved over HTTP at once (default is 20).
+    timeout : float, optional
+        The total timeout in seconds for one HTTP resolution (default is 15).
+    selenium_fallback : bool, optional
+        Whether to resolve failed links with Selenium (default is True).
+    cache_file : str, optional
+        A JSON file used to persist resolved links between runs (default is None, in-memory only).
+    metrics : Metrics, optional
+        The registry resolution counts and timings are recorded in (default is metrics.default_metrics).
+    """
+    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+    news_host = GOOGLE_NEWS_HOST
+    redirect_patterns = [
+        re.compile(r'<meta[^>]+http-equiv=["\']?refresh["\']?[^>]+content=["\'][^"\']*?url=([^"\'>]+)', re.I),
+        re.compile(r'data-n-au=["\']([^"\']+)["\']', re.I),
+    ]
+
+    def __init__(self, max_concurrency=20, timeout=15, selenium_fallback=True, cache_file=None, metrics=None):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.selenium_fallback = selenium_fallback
+        self.cache_file = cache_file
+        self.semaphore = None
+        self.cache = {}
+        self.metrics = metrics or default_metrics
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, 'r') as file:
+                self.cache = json.load(file)
+
+    def is_resolved(self, url):
+        return bool(url) and urlparse(url).netloc != self.news_host
+
+    def find_redirect_target(self, page, base_url):
+        for pattern in self.redirect_patterns:
+            match = pattern.search(page)
+            if match:
+                return urljoin(base_url, html.unescape(match.group(1).strip()))
+        return None
+
+    async def follow_redirects(self, session, url, max_hops=3):
+        for _ in range(max_hops):
+            async with session.get(url, allow_redirects=True) as response:
+                final_url = str(response.url)
+                if self.is_resolved(final_url):
+                    return final_url
+                page = await response.text(errors='ignore')
+            target = self.find_redirect_target(page, final_url)
+            if not target:
+                return None
+            if self.is_resolved(target):
+                return target
+            url = target
+        return None
+
+    @asynccontextmanager
+    async def open_session(self):
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {'User-Agent': self.user_agent}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            yield session
+
+    async def resolve_one(self, session, link):
+        link = link.strip()
+        if not link:
+            return None
+        if link in self.cache:
+            self.metrics.increment('resolve.cache_hits')
+            return self.cache[link]
+
+        final_url = decode_google_news_url(link) if urlparse(link).netloc == self.news_host else link
+        if final_url:
+            self.metrics.increment('resolve.decoded')
+        else:
+            try:
+                async with self.semaphore:
+                    with self.metrics.timer('resolve.redirect_seconds'):
+                        final_url = await self.follow_redirects(session, link)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error(f"Error resolving URL {link}: {e}")
+            self.metrics.increment('resolve.redirected' if final_url else 'resolve.http_failed')
+        if final_url:
+            self.cache[link] = final_url
+        return final_url
+
+    async def resolve_all(self, links):
+        """
+        Resolve a list of links concurrently, returning the resolved URLs in input
+        order with None for the links that could not be resolved over HTTP.
+        """
+        async with self.open_session() as session:
+            return await asyncio.gather(*(self.resolve_one(session, link) for link in links))
+
+    async def resolve_with_fallback(self, session, link):
+        """
+        Resolve a single link over HTTP, falling back to Selenium in a worker
+        thread if that fails. Returns the original link if nothing works.
+        """
+        final_url = await self.resolve_one(session, link)
+        if not final_url and self.selenium_fallback:
+            self.metrics.increment('resolve.selenium_fallbacks')
+            loop = asyncio.get_running_loop()
+            selenium_resolver = SeleniumLinkResolver(metrics=self.metrics)
+            fallback = await loop.run_in_executor(None, self.metrics.profiled('resolve', selenium_resolver.resolve_list),
+                                                  [link], 1, 1)
+            if self.is_resolved(fallback[0]):
+                final_url = self.cache[link] = fallback[0]
+        return final_url or link
+
+    def save_cache(self):
+        """
+        Merge the resolved links into cache_file. Concurrent runs sharing the file
+        keep each other's entries, and readers never see a half-written file.
+        """
+        if not self.cache_file:
+            return
+        with _cache_file_lock:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as file:
+                    self.cache = {**json.load(file), **self.cache}
+            temporary = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(temporary, 'w') as file:
+                json.dump(self.cache, file)
+            os.replace(temporary, self.cache_file)
+
+    def resolve_list(self, links, max_workers=5, batch_size=10):
+        links = [link.strip() for link in links]
+        resolved_links = asyncio.run(self.resolve_all(links))
+
+        failed = [i for i, url in enumerate(resolved_links) if links[i] and not url]
+        if failed and self.selenium_fallback:
+            logging.info(f"Falling back to Selenium for {len(failed)} of {len(links)} links")
+            self.metrics.increment('resolve.selenium_fallbacks', len(failed))
+            fallback = SeleniumLinkResolver(metrics=self.metrics).resolve_list([links[i] for i in failed], max_workers, batch_size)
+            for i, final_url in zip(failed, fallback):
+                if self.is_resolved(final_url):
+                    self.cache[links[i]] = final_url
+                    resolved_links[i] = final_url
+
+        self.save_cache()
+        return [final_url or link for link, final_url in zip(links, resolved_links)]
+
+    def resolve_links(self, input_file, output_file, max_workers=5, batch_size=10):
+        """
+        Resolve the final URLs of links from an input file and save them to an output file.
+        max_workers and batch_size only apply to the Selenium fallback.
+        """
+        with open(input_file, 'r') as file:
+            links = [link.strip() for link in file.readlines()]
+
+        with self.metrics.stage('resolve'):
+            resolved_links = self.resolve_list(links, max_workers, batch_size)
 
         with open(output_file, 'w') as file:
             for resolved_link in resolved_links:
@@ -88,8 +325,8 @@ class SeleniumLinkResolver:
 #test run
 if __name__ == "__main__":
     start = time.time()
-    selenium_resolver = SeleniumLinkResolver()
-    selenium_resolver.resolve_links('links_test.txt', 'links.txt', max_workers=5, batch_size=10)
-    ##change max_workers to change max number of chrome running
+    resolver = HTTPLinkResolver()
+    resolver.resolve_links('links_test.txt', 'links.txt', max_workers=5, batch_size=10)
+    ##change max_workers to change max number of chrome running for the Selenium fallback
     end = time.time()
     print(f"Time taken: {end - start}")
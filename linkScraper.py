@@ -1,12 +1,13 @@
+import asyncio
 import requests
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+import aiohttp
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
 import time
 import random
 import logging
+from contentExtractor import ContentExtractor
+from metrics import default_metrics
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -20,10 +21,51 @@ class URLResolver:
             return url
 
 class WebScraper:
-    def __init__(self, file_path):
+    """
+    Scrape the title and paragraphs of every URL in a links file.
+    Inputs:
+    file_path : str
+        The file path to the resolved links, or None when URLs are fed in directly.
+    pool : BrowserPool, optional
+        A browser pool used to render pages instead of fetching them with requests
+        (default is None, plain HTTP only).
+    max_concurrency : int, optional
+        The maximum number of pages fetched at once in async mode (default is 20).
+    max_per_domain : int, optional
+        The maximum number of pages fetched at once from one domain in async mode (default is 4).
+    timeout : float, optional
+        The total timeout in seconds for one page in async mode (default is 20).
+    max_page_bytes : int, optional
+        Response bodies are read up to this many bytes in async mode (default is 5 MB).
+    metrics : Metrics, optional
+        The registry fetch and parse counts and timings are recorded in (default is metrics.default_metrics).
+    http_cache : HTTPCache, optional
+        A response cache article pages are served from and revalidated against
+        (default is None). Not used when pages are rendered with a browser pool.
+    """
+    headers = {
+        'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+        'Accept': "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+    # Browsers do not expose the HTTP status, so rendered pages are recognised as blocked by their title
+    blocked_titles = ('access denied', '403 forbidden', 'attention required', 'just a moment...',
+                      'are you a robot', 'request blocked', 'you have been blocked')
+
+    def __init__(self, file_path, pool=None, max_concurrency=20, max_per_domain=4, timeout=20,
+                 max_page_bytes=5 * 1024 * 1024, metrics=None, http_cache=None):
         self.file_path = file_path
-        self.url_list = self.load_urls(file_path)
-        self.driver = self.set_up_browser()
+        self.url_list = self.load_urls(file_path) if file_path else []
+        self.pool = pool
+        self.max_concurrency = max_concurrency
+        self.max_per_domain = max_per_domain
+        self.timeout = timeout
+        self.max_page_bytes = max_page_bytes
+        self.extractor = ContentExtractor()
+        self.metrics = metrics or default_metrics
+        self.http_cache = http_cache
+        self.semaphore = None
+        self.domain_semaphores = {}
         self.url_resolver = URLResolver()
     
     @staticmethod
@@ -34,76 +76,168 @@ class WebScraper:
                 url_list.append(line.strip())
         return url_list
 
-    @staticmethod
-    def set_up_browser():
-        custom_headers = {
-            'Accept-Language': 'en-US,en;q=0.9',
-            "Referer": "https://www.google.com/",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Sec-Ch-Ua": "\"Not A(Brand\";v=\"99\", \"Google Chrome\";v=\"121\", \"Chromium\";v=\"121\"",
-            "Sec-Ch-Ua-Platform": "\"Windows\"",
-            'User-Agent': "Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; Googlebot/2.1; +http://www.google.com/bot.html) Chrome/W.X.Y.Z Safari/537.36",
-        }
-
-        service = Service(ChromeDriverManager().install())
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument("--enable-features=NetworkService,NetworkServiceInProcess")
-        options.add_argument('custom_headers')
-        driver = webdriver.Chrome(service=service, options=options)
-        return driver
+    def fetch_page(self, link):
+        """
+        Return (final_url, status_code, html) for link. Pages are rendered with a
+        pooled browser when a pool is set, otherwise fetched with requests.
+        """
+        if self.pool is not None:
+            with self.pool.driver() as driver:
+                driver.get(link)
+                status_code = 403 if self.is_blocked_title(driver.title) else 200
+                return driver.current_url, status_code, driver.page_source
+
+        if self.http_cache is not None:
+            return self.http_cache.fetch_sync(link, 'article', self.headers, metrics=self.metrics)
+
+        resolved_url = self.url_resolver.resolve_url(link)
+        response = requests.get(resolved_url, allow_redirects=True)
+        return resolved_url, response.status_code, response.content
+
+    def is_blocked_title(self, title):
+        title = (title or '').strip().lower()
+        return title == 'forbidden' or any(blocked in title for blocked in self.blocked_titles)
 
     def extract_data(self, link):
         logging.info(f"Extracting data from {link}")
         try:
-            resolved_url = self.url_resolver.resolve_url(link)
-            response = requests.get(resolved_url, allow_redirects=True)
+            with self.metrics.timer('scrape.fetch_seconds'):
+                resolved_url, status_code, html = self.fetch_page(link)
             
-            if response.status_code == 403:
+            if status_code == 403:
                 logging.warning(f"403 Forbidden error for {resolved_url}")
+                self.metrics.increment('scrape.forbidden')
                 return None, None, True  # Indicate that this URL should be removed
             
-            html = response.content
-            soup = BeautifulSoup(html, 'html.parser')
+            title, output = self.parse_page(html)
+            self.metrics.increment('scrape.fetched')
+            return title, output, False  # False indicates that the URL should not be removed
+        except Exception as e:
+            logging.error(f"Error extracting data from {link}: {e}")
+            self.metrics.increment('scrape.failed')
+            return None, None, False
 
-            title = soup.find('title').text if soup.find('title') else 'No title found'
-            paragraphs = [p.text for p in soup.find_all('p')]
+    def parse_page(self, html):
+        with self.metrics.timer('scrape.parse_seconds'):
+            title, paragraphs = self.extractor.extract(html)
+        return title, self.extractor.format_article(title, paragraphs)
 
-            output = f'Title: {title}\n'
-            for paragraph in paragraphs:
-                output += f'Text: {paragraph}\n'
-            output += '\n'
-            return title, output, False  # False indicates that the URL should not be removed
+    async def fetch_page_async(self, session, link):
+        """
+        Fetch link in one round trip, following redirects, and stream the body up
+        to max_page_bytes. Returns (final_url, status_code, html).
+        """
+        if self.http_cache is not None:
+            return await self.http_cache.fetch(session, link, 'article', read=self.read_body, metrics=self.metrics)
+
+        async with session.get(link, allow_redirects=True) as response:
+            return str(response.url), response.status, await self.read_body(response)
+
+    async def read_body(self, response):
+        if response.status == 403:
+            return None
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_page_bytes:
+                logging.warning(f"Truncated {response.url} at {self.max_page_bytes} bytes")
+                break
+        return b''.join(chunks)[:self.max_page_bytes]
+
+    @asynccontextmanager
+    async def open_session(self):
+        """
+        Open a pooled session together with the global and per-domain limits used by extract_data_async.
+        """
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.domain_semaphores = {}
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.max_per_domain)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers) as session:
+            yield session
+
+    async def extract_data_async(self, session, link):
+        logging.info(f"Extracting data from {link}")
+        domain = urlparse(link).netloc
+        if domain not in self.domain_semaphores:
+            self.domain_semaphores[domain] = asyncio.Semaphore(self.max_per_domain)
+        try:
+            async with self.domain_semaphores[domain], self.semaphore:
+                with self.metrics.timer('scrape.fetch_seconds'):
+                    resolved_url, status_code, html = await self.fetch_page_async(session, link)
+
+            if status_code == 403:
+                logging.warning(f"403 Forbidden error for {resolved_url}")
+                self.metrics.increment('scrape.forbidden')
+                return None, None, True  # Indicate that this URL should be removed
+
+            # Parsing is CPU-bound, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            title, output = await loop.run_in_executor(None, self.metrics.profiled('scrape', self.parse_page), html)
+            self.metrics.increment('scrape.fetched')
+            return title, output, False
         except Exception as e:
             logging.error(f"Error extracting data from {link}: {e}")
+            self.metrics.increment('scrape.failed')
             return None, None, False
 
+    async def scrape_all(self, urls):
+        """
+        Scrape urls concurrently and return the extract_data results in input order.
+        """
+        async with self.open_session() as session:
+            return await asyncio.gather(*(self.extract_data_async(session, url) for url in urls))
+
+    def scrape_sequential(self, urls):
+        results = []
+        for url in urls:
+            try:
+                self.wait_if_required()
+                results.append(self.extract_data(url))
+            except Exception as e:
+                logging.error(f"Error processing {url}: {e}")
+                results.append((None, None, False))
+        return results
+
     @staticmethod
     def wait_if_required():
         if random.random() < 0.1:
             logging.info("Waiting for 10 seconds...")
             time.sleep(10)
 
-    def process_urls(self):
+    def process_urls(self, use_async=True):
+        """
+        Scrape every URL and write Heading.txt and Content.txt in source order.
+        URLs that answer 403 are dropped from the links file.
+        Inputs:
+        use_async : bool, optional
+            Whether to scrape concurrently with aiohttp (default is True). Pages are
+            always scraped one by one when a browser pool is set.
+        """
+        urls = []
+        for url in self.url_list:
+            if not url.startswith('http'):
+                logging.warning(f"Invalid URL: {url}")
+                continue
+            urls.append(url)
+
+        with self.metrics.stage('scrape'):
+            if use_async and self.pool is None:
+                results = asyncio.run(self.scrape_all(urls))
+            else:
+                results = self.scrape_sequential(urls)
+
         with open('Heading.txt', 'w', encoding='utf-8') as heading_file, open('Content.txt', 'w', encoding='utf-8') as content_file:
             i = 1
             urls_to_remove = []
-            for url in self.url_list:
-                if not url.startswith('http'):
-                    logging.warning(f"Invalid URL: {url}")
-                    continue
-                try:
-                    self.wait_if_required()
-                    heading, data, should_remove = self.extract_data(url)
-                    if should_remove:
-                        urls_to_remove.append(url)
-                    elif heading and data:
-                        heading_file.write(f"Link: {url}\nHeading: {heading}\n\n")
-                        content_file.write(f"Source {i}: {url}\n{data}\n")
-                        i += 1
-                except Exception as e:
-                    logging.error(f"Error processing {url}: {e}")
+            for url, (heading, data, should_remove) in zip(urls, results):
+                if should_remove:
+                    urls_to_remove.append(url)
+                elif heading and data:
+                    heading_file.write(f"Link: {url}\nHeading: {heading}\n\n")
+                    content_file.write(f"Source {i}: {url}\n{data}\n")
+                    i += 1
             
             # Remove 403 Forbidden URLs from the list
             for url in urls_to_remove:
@@ -0,0 +1,218 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Only one profiler can be active per process, whichever run it belongs to
+_profiling = threading.Lock()
+
+class Metrics:
+    """
+    Thread-safe registry of counters, timings and stage durations for one or more runs.
+    Counters are plain totals (e.g. scrape.forbidden), timings keep the count, sum
+    and max of observed durations (e.g. summarize.generate_seconds), and stages
+    record wall-clock start/end of each pipeline stage.
+    Inputs:
+    profiler : str, optional
+        'cprofile' or 'pyinstrument' to profile every stage run with stage(name) and
+        every call of a function wrapped with profiled(name, function), None to
+        disable profiling (default is None).
+    """
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.timings = {}
+        self.stages = {}
+        self.profile_data = {}
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def observe(self, name, seconds):
+        with self.lock:
+            count, total, maximum = self.timings.get(name, (0, 0.0, 0.0))
+            self.timings[name] = (count + 1, total + seconds, max(maximum, seconds))
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    @contextmanager
+    def stage(self, name, profile=True):
+        """
+        Record the wall time of a stage and, when a profiler is configured and
+        profile is true, profile it. Overlapping stages, also those of other runs,
+        are timed but only the first one is profiled.
+        """
+        with self.lock:
+            self.stages[name] = {'started_at': time.time(), 'finished_at': None, 'seconds': None}
+        profiler = self.start_profiler() if profile and self.profiler else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler is not None:
+                self.stop_profiler(name, profiler)
+            with self.lock:
+                self.stages[name].update(finished_at=time.time(), seconds=seconds)
+
+    def profiled(self, name, function):
+        """
+        Wrap function so its calls are profiled into the profile of stage name, on
+        whichever thread runs them. Profilers only see the thread that started them,
+        so this is how work handed to run_in_executor gets profiled. Calls that
+        overlap another profiled call run unprofiled; profile.<name>.profiled and
+        profile.<name>.skipped count both kinds, see profile_coverage().
+        """
+        if not self.profiler:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = self.start_profiler()
+            self.increment(f"profile.{name}.{'skipped' if profiler is None else 'profiled'}")
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if profiler is not None:
+                    self.stop_profiler(name, profiler)
+        return wrapper
+
+    def start_profiler(self):
+        if not _profiling.acquire(blocking=False):
+            return None
+        if self.profiler == 'pyinstrument':
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def stop_profiler(self, name, profiler):
+        """
+        Stop profiler and add what it recorded to the profile of stage name.
+        """
+        try:
+            if self.profiler == 'pyinstrument':
+                from pyinstrument.session import Session
+                session = profiler.stop()
+                with self.lock:
+                    if name in self.profile_data:
+                        session = Session.combine(self.profile_data[name], session)
+                    self.profile_data[name] = session
+            else:
+                profiler.disable()
+                with self.lock:
+                    if name in self.profile_data:
+                        self.profile_data[name].add(profiler)
+                    else:
+                        self.profile_data[name] = pstats.Stats(profiler)
+        finally:
+            _profiling.release()
+
+    def profile_coverage(self, name):
+        """
+        Return (profiled calls, all calls) of the functions wrapped with profiled(name, ...).
+        """
+        with self.lock:
+            profiled = int(self.counters.get(f"profile.{name}.profiled", 0))
+            skipped = int(self.counters.get(f"profile.{name}.skipped", 0))
+        return profiled, profiled + skipped
+
+    @property
+    def profiles(self):
+        """
+        Return {stage name: text report} for every stage profiled so far.
+        """
+        reports = {}
+        with self.lock:
+            for name, data in self.profile_data.items():
+                if self.profiler == 'pyinstrument':
+                    from pyinstrument.renderers import ConsoleRenderer
+                    reports[name] = ConsoleRenderer(unicode=True).render(data)
+                else:
+                    stream = io.StringIO()
+                    data.stream = stream
+                    data.sort_stats('cumulative').print_stats(30)
+                    reports[name] = stream.getvalue()
+        return reports
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'timings': {
+                    name: {'count': count, 'sum': total, 'mean': total / count if count else 0.0, 'max': maximum}
+                    for name, (count, total, maximum) in self.timings.items()
+                },
+                'stages': {name: dict(stage) for name, stage in self.stages.items()},
+            }
+
+    def merge(self, snapshot):
+        """
+        Add the counters and timings of a snapshot taken elsewhere, e.g. in a worker process.
+        """
+        with self.lock:
+            for name, value in snapshot['counters'].items():
+                self.counters[name] += value
+            for name, timing in snapshot['timings'].items():
+                count, total, maximum = self.timings.get(name, (0, 0.0, 0.0))
+                self.timings[name] = (count + timing['count'], total + timing['sum'], max(maximum, timing['max']))
+
+    def hit_rate(self, hits, misses):
+        with self.lock:
+            lookups = self.counters.get(hits, 0) + self.counters.get(misses, 0)
+            return self.counters.get(hits, 0) / lookups if lookups else 0.0
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix='sentinel'):
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        def metric_name(name):
+            return f"{prefix}_{name.replace('.', '_').replace('-', '_')}"
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            lines += [f"# TYPE {metric_name(name)}_total counter", f"{metric_name(name)}_total {value:g}"]
+        for name, timing in sorted(snapshot['timings'].items()):
+            lines += [
+                f"# TYPE {metric_name(name)} summary",
+                f"{metric_name(name)}_count {timing['count']}",
+                f"{metric_name(name)}_sum {timing['sum']:.6f}",
+                f"# TYPE {metric_name(name)}_max gauge",
+                f"{metric_name(name)}_max {timing['max']:.6f}",
+            ]
+        if snapshot['stages']:
+            lines.append(f"# TYPE {prefix}_stage_seconds gauge")
+            for name, stage in sorted(snapshot['stages'].items()):
+                if stage['seconds'] is not None:
+                    lines.append(f'{prefix}_stage_seconds{{stage="{name}"}} {stage["seconds"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timings.clear()
+            self.stages.clear()
+            self.profile_data.clear()
+
+# Registry used by every component that is not given its own
+default_metrics = Metrics()
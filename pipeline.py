@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import os
+import time
+from metrics import default_metrics
+
+DONE = object()
+
+class DebugSink:
+    """
+    Write the intermediate pipeline data to the classic text files as items pass each stage.
+    Inputs:
+    directory : str
+        The directory to write links_temp.txt, links.txt, Content.txt, Heading.txt and summaries.txt to.
+    Heading.txt and summaries.txt are both written when an article is summarized,
+    so entry N of one always belongs to entry N of the other.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        self.article_count = 0
+
+    def write(self, name, text):
+        if name not in self.files:
+            self.files[name] = open(os.path.join(self.directory, name), 'w', encoding='utf-8')
+        self.files[name].write(text)
+        self.files[name].flush()
+
+    def gathered(self, article):
+        self.write('links_temp.txt', f"{article['link']}\n")
+
+    def resolved(self, article):
+        self.write('links.txt', f"{article['url']}\n")
+
+    def scraped(self, article):
+        self.write('Content.txt', f"Source {article['index'] + 1}: {article['url']}\n{article['content']}\n")
+
+    def duplicate(self, article):
+        self.write('duplicates.txt', f"{article['url']} duplicates {article['duplicate_of']['url']}\n")
+
+    def summarized(self, article):
+        self.article_count += 1
+        self.write('Heading.txt', f"Link: {article['url']}\nHeading: {article['title']}\n\n")
+        self.write('summaries.txt', f"Article {self.article_count} Summary:\n{article['summary']}\n\n")
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+class StoreSink:
+    """
+    Write every article to an ArticleStore as it passes each stage.
+    """
+    def __init__(self, store, run_id):
+        self.store = store
+        self.run_id = run_id
+
+    def gathered(self, article):
+        article['id'] = self.store.add_link(self.run_id, article['index'], article['link'], article.get('query'),
+                                            article.get('title'), article.get('publisher'), article.get('published_at'))
+
+    def resolved(self, article):
+        self.store.set_resolved_url(article['id'], article['url'])
+
+    def scraped(self, article):
+        self.store.set_content(article['id'], article['title'], article['body'])
+
+    def duplicate(self, article):
+        self.store.set_duplicate(article['id'], article['duplicate_of']['id'])
+
+    def summarized(self, article):
+        self.store.set_summary(article['id'], article['summary'])
+
+    def close(self):
+        pass
+
+class SeenSink:
+    """
+    Add an article's link and URL to a SeenIndex once it has reached a final outcome:
+    summarized, recorded as a near-duplicate, or dropped for good (forbidden, not
+    an article, already seen under another link). Failures that may be temporary
+    (network errors, error summaries) are counted instead, and the link is only
+    given up on after max_attempts of them. Links still in flight when a run stops
+    stay out of the index and are tried again.
+    Inputs:
+    seen_index : SeenIndex
+    error_summary : str, optional
+        The summary the summarizer returns on failure (default is None).
+    max_attempts : int, optional
+        The number of temporary failures after which a link is marked seen anyway (default is 3).
+    """
+    def __init__(self, seen_index, error_summary=None, max_attempts=3):
+        self.seen_index = seen_index
+        self.error_summary = error_summary
+        self.max_attempts = max_attempts
+
+    def mark(self, article):
+        self.seen_index.add('link', article['link'])
+        if article.get('url') and article['url'] != article['link']:
+            self.seen_index.add('url', article['url'])
+
+    def fail(self, article):
+        attempts = self.seen_index.record_failure('link', article['link'])
+        if attempts >= self.max_attempts:
+            logging.info(f"Giving up on {article['link']} after {attempts} failed attempts")
+            self.mark(article)
+
+    def gathered(self, article):
+        pass
+
+    def resolved(self, article):
+        pass
+
+    def scraped(self, article):
+        pass
+
+    def duplicate(self, article):
+        self.mark(article)
+
+    def summarized(self, article):
+        if article['summary'] == self.error_summary:
+            self.fail(article)
+        else:
+            self.mark(article)
+
+    def close(self):
+        pass
+
+class NewsPipeline:
+    """
+    Run gathering, link resolution, scraping and summarization as overlapping stages.
+    The stages are connected by bounded asyncio queues, so resolution starts on the
+    first gathered link, scraping on the first resolved URL and summarization on
+    the first scraped article. Articles are written incrementally to store when
+    one is given; the classic text files are only written when debug_dir is set.
+    Inputs:
+    news_gatherer : NewsGatherer
+    link_resolver : HTTPLinkResolver
+    scraper : WebScraper
+    summarizer : ArticleSummarizer
+    queue_size : int, optional
+        The capacity of each queue between two stages (default is 50).
+    resolve_workers : int, optional
+        The number of links resolved at once (default is the resolver's max_concurrency).
+    scrape_workers : int, optional
+        The number of pages scraped at once (default is the scraper's max_concurrency).
+    store : ArticleStore, optional
+        The store every stage writes to; each run gets its own run_id (default is None).
+    seen_index : SeenIndex, optional
+        If set, gathered links and resolved URLs already in the index are skipped,
+        and those of every article that reached a final outcome are added to it (see
+        SeenSink), so repeated runs only process new articles and retry the ones
+        that failed temporarily (default is None).
+    deduplicator : NearDuplicateDetector, optional
+        If set, scraped articles that near-duplicate an earlier one are recorded as
+        alternate sources of it and are not summarized (default is None).
+    debug_dir : str, optional
+        If set, the classic intermediate files are written to this directory (default is None).
+    metrics : Metrics, optional
+        The registry per-stage durations and item counts are recorded in; pass the
+        same one to the stage components to see their counters next to them
+        (default is metrics.default_metrics).
+    """
+    def __init__(self, news_gatherer, link_resolver, scraper, summarizer, queue_size=50,
+                 resolve_workers=None, scrape_workers=None, store=None, seen_index=None, deduplicator=None,
+                 debug_dir=None, metrics=None):
+        self.news_gatherer = news_gatherer
+        self.link_resolver = link_resolver
+        self.scraper = scraper
+        self.summarizer = summarizer
+        self.queue_size = queue_size
+        self.resolve_workers = resolve_workers or link_resolver.max_concurrency
+        self.scrape_workers = scrape_workers or scraper.max_concurrency
+        self.store = store
+        self.seen_index = seen_index
+        self.in_run = set()
+        self.deduplicator = deduplicator
+        self.representatives = {}
+        self.metrics = metrics or default_metrics
+        self.run_id = None
+        self.sinks = []
+        self.seen_sink = None
+        if store is not None:
+            self.run_id = store.start_run(
+                news_gatherer.search_queries,
+                date_of_news=news_gatherer.date_of_news,
+                location=news_gatherer.location,
+                language=news_gatherer.language,
+                total_number_of_urls=news_gatherer.total_number_of_urls,
+            )
+            self.sinks.append(StoreSink(store, self.run_id))
+        if seen_index is not None:
+            # After the store sink, so an article is only marked seen once its summary has been written
+            self.seen_sink = SeenSink(seen_index, getattr(summarizer, 'error_summary', None))
+            self.sinks.append(self.seen_sink)
+        if debug_dir:
+            self.sinks.append(DebugSink(debug_dir))
+
+    def notify(self, event, article):
+        self.metrics.increment(f"pipeline.{event}")
+        for sink in self.sinks:
+            getattr(sink, event)(article)
+
+    def is_new(self, kind, item):
+        # Only checks the index, which SeenSink fills once articles are summarized; within
+        # a run each link and URL still goes through the pipeline at most once
+        if self.seen_index is None:
+            return True
+        if (kind, item) in self.in_run:
+            return False
+        self.in_run.add((kind, item))
+        return not self.seen_index.contains(kind, item)
+
+    def settle(self, article, final=True):
+        """
+        Record in the seen index that an article was dropped: for good when final,
+        otherwise as a failed attempt that may be retried in a later run.
+        """
+        if self.seen_sink is None:
+            return
+        if final:
+            self.seen_sink.mark(article)
+        else:
+            self.seen_sink.fail(article)
+
+    async def gather_stage(self, outbox):
+        index = 0
+        try:
+            async for query, link in self.news_gatherer.iter_news_links(lambda link: self.is_new('link', link)):
+                article = {'index': index, 'query': query, 'link': link, **self.news_gatherer.link_metadata(link)}
+                index += 1
+                self.notify('gathered', article)
+                await outbox.put(article)
+        finally:
+            await outbox.put(DONE)
+
+    async def run_workers(self, workers, inbox, outbox, handle):
+        """
+        Run handle over every item of inbox with several workers, putting non-None
+        results into outbox, then signal outbox that the stage is done.
+        """
+        async def worker():
+            while True:
+                article = await inbox.get()
+                if article is DONE:
+                    await inbox.put(DONE)  # let the sibling workers see it too
+                    return
+                article = await handle(article)
+                if article is not None:
+                    await outbox.put(article)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            await outbox.put(DONE)
+
+    async def resolve_stage(self, inbox, outbox):
+        async with self.link_resolver.open_session() as session:
+            async def resolve(article):
+                article['url'] = await self.link_resolver.resolve_with_fallback(session, article['link'])
+                if article['url'] != article['link'] and not self.is_new('url', article['url']):
+                    logging.info(f"Skipping already seen {article['url']}")
+                    self.metrics.increment('pipeline.seen_skipped')
+                    # Only the link: the URL is marked by the article that got there first
+                    self.settle({'link': article['link']})
+                    return None
+                self.notify('resolved', article)
+                return article
+
+            await self.run_workers(self.resolve_workers, inbox, outbox, resolve)
+        self.link_resolver.save_cache()
+
+    async def scrape_stage(self, inbox, outbox):
+        async with self.scraper.open_session() as session:
+            async def scrape(article):
+                if not article['url'].startswith('http'):
+                    logging.warning(f"Invalid URL: {article['url']}")
+                    self.settle(article)
+                    return None
+                title, content, should_remove = await self.scraper.extract_data_async(session, article['url'])
+                if content is None and not should_remove:
+                    # The scraper logs and swallows fetch errors, which may go away in a later run
+                    self.settle(article, final=False)
+                    return None
+                body = self.summarizer.article_body(content) if content else None
+                if should_remove or not title or not body:
+                    self.settle(article)
+                    return None
+                article.update(title=title, content=content, body=body)
+                self.notify('scraped', article)
+                return self.deduplicate(article)
+
+            await self.run_workers(self.scrape_workers, inbox, outbox, scrape)
+
+    def deduplicate(self, article):
+        """
+        Return article if it should be summarized, or None if it near-duplicates
+        an article seen earlier in this run.
+        """
+        if self.deduplicator is None:
+            return article
+        representative = self.deduplicator.add(article['index'], article['body'])
+        if representative == article['index']:
+            self.representatives[article['index']] = article
+            return article
+        article['duplicate_of'] = self.representatives[representative]
+        self.notify('duplicate', article)
+        logging.info(f"Skipping {article['url']}, near-duplicate of {article['duplicate_of']['url']}")
+        return None
+
+    async def summarize_stage(self, inbox, outbox):
+        """
+        Summarize whatever has been scraped so far in one batch, up to the
+        summarizer's batch_size, while the earlier stages keep running.
+        """
+        loop = asyncio.get_running_loop()
+        finished = False
+        try:
+            while not finished:
+                article = await inbox.get()
+                if article is DONE:
+                    break
+                batch = [article]
+                while len(batch) < self.summarizer.batch_size:
+                    try:
+                        article = inbox.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if article is DONE:
+                        finished = True
+                        break
+                    batch.append(article)
+
+                self.metrics.increment('pipeline.summarize_batches')
+                summaries = await loop.run_in_executor(
+                    None, self.metrics.profiled('summarize', self.summarizer.summarize_batch),
+                    [article['body'] for article in batch]
+                )
+                for article, summary in zip(batch, summaries):
+                    article['summary'] = summary
+                    self.notify('summarized', article)
+                    await outbox.put(article)
+        finally:
+            await outbox.put(DONE)
+
+    async def stream(self):
+        """
+        Run the pipeline and yield each article dict (index, query, link, url, title,
+        content, body, summary, id when a store is set, and publisher and published_at
+        when the gatherer provides them) as soon as it has been summarized.
+        """
+        links = asyncio.Queue(self.queue_size)
+        urls = asyncio.Queue(self.queue_size)
+        articles = asyncio.Queue(self.queue_size)
+        results = asyncio.Queue()
+        start = time.time()
+
+        async def timed(name, stage):
+            # The stages overlap, so only their wall time is recorded here. Their CPU work runs in
+            # executor threads and is profiled there (Metrics.profiled), per stage
+            with self.metrics.stage(name, profile=False):
+                await stage
+
+        async def supervise():
+            stages = [
+                asyncio.create_task(timed('gather', self.gather_stage(links))),
+                asyncio.create_task(timed('resolve', self.resolve_stage(links, urls))),
+                asyncio.create_task(timed('scrape', self.scrape_stage(urls, articles))),
+                asyncio.create_task(timed('summarize', self.summarize_stage(articles, results))),
+            ]
+            try:
+                await asyncio.gather(*stages)
+            finally:
+                # If one stage fails, stop the others instead of leaving them blocked on a queue
+                for stage in stages:
+                    stage.cancel()
+                await results.put(DONE)
+
+        count = 0
+        with self.metrics.stage('pipeline', profile=False):
+            supervisor = asyncio.create_task(supervise())
+            try:
+                while True:
+                    article = await results.get()
+                    if article is DONE:
+                        break
+                    count += 1
+                    if count == 1:
+                        self.metrics.observe('pipeline.first_summary_seconds', time.time() - start)
+                        logging.info(f"First summary ready after {time.time() - start:.2f} seconds")
+                    yield article
+                await supervisor  # re-raise anything a stage failed with
+            finally:
+                supervisor.cancel()
+                for sink in self.sinks:
+                    sink.close()
+        logging.info(f"Pipeline summarized {count} articles in {time.time() - start:.2f} seconds")
+
+    async def run(self):
+        return [article async for article in self.stream()]
+
+#test run
+if __name__ == "__main__":
+    from articleStore import ArticleStore
+    from dedup import NearDuplicateDetector
+    from googleNewsExtractor import NewsGatherer
+    from linkResolver import HTTPLinkResolver
+    from linkScraper import WebScraper
+    from summarizer import ArticleSummarizer
+
+    start = time.time()
+    news_gatherer = NewsGatherer(['Artificial intelligence'], "1y", 10, None, "IN", "en")
+    pipeline = NewsPipeline(news_gatherer, HTTPLinkResolver(), WebScraper(None), ArticleSummarizer(),
+                            store=ArticleStore(), deduplicator=NearDuplicateDetector(), debug_dir='.')
+    articles = asyncio.run(pipeline.run())
+    end = time.time()
+    print(f"Summarized {len(articles)} articles in {end - start:.2f} seconds")
@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from articleStore import ArticleStore
+from googleNewsExtractor import NewsGatherer
+from linkResolver import HTTPLinkResolver
+from linkScraper import WebScraper
+from metrics import Metrics
+from rssNewsGatherer import RSSNewsGatherer
+from summarizer import ArticleSummarizer
+from workQueue import WorkQueue
+
+STAGES = ['resolve', 'scrape', 'summarize']
+
+async def submit_run(queue, store, news_gatherer):
+    """
+    Gather the links of a run, add them to the store and enqueue one resolve task
+    per link. Returns (run_id, number of links enqueued).
+    """
+    run_id = store.start_run(
+        news_gatherer.search_queries,
+        date_of_news=news_gatherer.date_of_news,
+        location=news_gatherer.location,
+        language=news_gatherer.language,
+        total_number_of_urls=news_gatherer.total_number_of_urls,
+    )
+    count = 0
+    async for query, link in news_gatherer.iter_news_links():
+        metadata = news_gatherer.link_metadata(link)
+        article_id = store.add_link(run_id, count, link, query, metadata.get('title'),
+                                    metadata.get('publisher'), metadata.get('published_at'))
+        queue.put('resolve', run_id, article_id, {'link': link})
+        count += 1
+    logging.info(f"Enqueued {count} links for run {run_id}")
+    return run_id, count
+
+def wait_for_run(queue, run_id, poll_interval=2.0):
+    while queue.pending(run_id):
+        time.sleep(poll_interval)
+    return queue.stats(run_id)
+
+class QueueWorker:
+    """
+    Lease resolve, scrape and summarize tasks from a WorkQueue and write their
+    results to an ArticleStore, for as many worker processes on one host as share
+    the two database files. Running some workers with only the resolve stage and others
+    with only summarize scales the browser-heavy and the model-heavy stage separately.
+    Every task writes its result to the store before it is completed, and the
+    store updates are keyed by article, so a task retried after a lost lease
+    writes the same row again instead of a second one. Near-duplicate detection
+    needs the whole run in one process and is not applied here.
+    Inputs:
+    queue : WorkQueue
+    store : ArticleStore
+    stages : list of str, optional
+        The stages this worker takes tasks from (default is all of them).
+    worker_id : str, optional
+        The lease owner name (default is hostname:pid).
+    batch_size : int, optional
+        The number of resolve or scrape tasks leased and run at once (default is 10).
+    poll_interval : float, optional
+        The number of seconds to wait when there is no work (default is 1.0).
+    link_resolver : HTTPLinkResolver, optional
+    scraper : WebScraper, optional
+    summarizer : ArticleSummarizer or ExtractiveSummarizer, optional
+        Created with their defaults when not given; the summarizer (and its
+        model) only when this worker runs the summarize stage.
+    metrics : Metrics, optional
+        The registry task counts and timings are recorded in (default is a new Metrics).
+    """
+    def __init__(self, queue, store, stages=None, worker_id=None, batch_size=10, poll_interval=1.0,
+                 link_resolver=None, scraper=None, summarizer=None, metrics=None):
+        self.queue = queue
+        self.store = store
+        self.stages = [stage for stage in STAGES if stage in (stages or STAGES)]
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.metrics = metrics or Metrics()
+        self.link_resolver = link_resolver or HTTPLinkResolver(cache_file="resolved_links.json", metrics=self.metrics)
+        self.scraper = scraper or WebScraper(None, metrics=self.metrics)
+        self.summarizer = summarizer
+        if self.summarizer is None and 'summarize' in self.stages:
+            self.summarizer = ArticleSummarizer(metrics=self.metrics)
+
+    async def resolve(self, session, task):
+        url = await self.link_resolver.resolve_with_fallback(session, task['payload']['link'])
+        self.store.set_resolved_url(task['article_id'], url)
+        if not url.startswith('http'):
+            logging.warning(f"Invalid URL: {url}")
+            return []
+        return [('scrape', {'url': url})]
+
+    async def scrape(self, session, task):
+        title, content, should_remove = await self.scraper.extract_data_async(session, task['payload']['url'])
+        if should_remove:
+            return []
+        if content is None:
+            # extract_data_async logs and swallows network errors; let the queue retry them
+            raise RuntimeError(f"Could not scrape {task['payload']['url']}")
+        body = ArticleSummarizer.article_body(content)
+        if not title or not body:
+            return []
+        self.store.set_content(task['article_id'], title, body)
+        return [('summarize', {})]
+
+    def finish(self, task, follow_ups):
+        if self.queue.complete(task, self.worker_id, follow_ups):
+            self.metrics.increment(f"queue.{task['stage']}.completed")
+        else:
+            logging.warning(f"Lease on {task['id']} expired before it completed; another worker has it")
+            self.metrics.increment('queue.leases_lost')
+
+    def release(self, task, error):
+        logging.error(f"Task {task['id']} failed (attempt {task['attempts']}): {error}")
+        self.queue.fail(task, self.worker_id, error)
+        self.metrics.increment(f"queue.{task['stage']}.failed")
+
+    async def run_task(self, handle, session, task):
+        try:
+            with self.metrics.timer(f"queue.{task['stage']}_seconds"):
+                follow_ups = await handle(session, task)
+        except Exception as e:
+            self.release(task, e)
+            return
+        self.finish(task, follow_ups)
+
+    async def summarize(self, tasks):
+        articles = [self.store.get(task['article_id']) for task in tasks]
+        loop = asyncio.get_running_loop()
+        try:
+            with self.metrics.timer('queue.summarize_seconds'):
+                summaries = await loop.run_in_executor(
+                    None, self.summarizer.summarize_batch, [article['body'] for article in articles]
+                )
+        except Exception as e:
+            for task in tasks:
+                self.release(task, e)
+            return
+        for task, summary in zip(tasks, summaries):
+            self.store.set_summary(task['article_id'], summary)
+            self.finish(task, [])
+
+    async def run_once(self, sessions):
+        """
+        Lease and run one batch for every stage of this worker, returning the number of tasks run.
+        """
+        count = 0
+        # Later stages go first, so articles already in flight are finished before new ones start
+        for stage in reversed(self.stages):
+            if stage == 'summarize':
+                tasks = self.queue.lease([stage], self.worker_id, self.summarizer.batch_size)
+                if tasks:
+                    await self.summarize(tasks)
+            else:
+                handle = self.resolve if stage == 'resolve' else self.scrape
+                tasks = self.queue.lease([stage], self.worker_id, self.batch_size)
+                await asyncio.gather(*(self.run_task(handle, sessions[stage], task) for task in tasks))
+            count += len(tasks)
+        return count
+
+    async def run(self, idle_timeout=None):
+        """
+        Work until stopped, or until there has been no work for idle_timeout seconds.
+        """
+        logging.info(f"Worker {self.worker_id} started on {', '.join(self.stages)}")
+        idle_since = time.time()
+        async with self.link_resolver.open_session() as resolve_session, self.scraper.open_session() as scrape_session:
+            sessions = {'resolve': resolve_session, 'scrape': scrape_session}
+            try:
+                while True:
+                    if await self.run_once(sessions):
+                        idle_since = time.time()
+                    elif idle_timeout is not None and time.time() - idle_since >= idle_timeout:
+                        break
+                    else:
+                        await asyncio.sleep(self.poll_interval)
+            finally:
+                self.link_resolver.save_cache()
+        logging.info(f"Worker {self.worker_id} stopped: {json.dumps(self.metrics.snapshot()['counters'])}")
+
+def run_worker(args):
+    queue = WorkQueue(args.queue, visibility_timeout=args.visibility_timeout, max_attempts=args.max_attempts)
+    store = ArticleStore(args.db)
+    metrics = Metrics()
+    summarizer = None
+    if 'summarize' in args.stages:
+        if args.extractive:
+            from extractiveSummarizer import ExtractiveSummarizer
+            summarizer = ExtractiveSummarizer(metrics=metrics)
+        else:
+            from summaryCache import SummaryCache
+            summarizer = ArticleSummarizer(model_name=args.model, engine=args.engine, cache=SummaryCache(),
+                                           metrics=metrics)
+    worker = QueueWorker(queue, store, args.stages, batch_size=args.batch_size, metrics=metrics,
+                         link_resolver=HTTPLinkResolver(cache_file="resolved_links.json",
+                                                        selenium_fallback=not args.no_selenium, metrics=metrics),
+                         summarizer=summarizer)
+    asyncio.run(worker.run(args.idle_exit))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run SENTINEL stages as tasks on a durable work queue.")
+    parser.add_argument("--db", default="sentinel.db", help="article store path")
+    parser.add_argument("--queue", default="work_queue.db", help="work queue path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="gather links and enqueue them")
+    submit.add_argument("queries", nargs="+")
+    submit.add_argument("--num-urls", type=int, default=10)
+    submit.add_argument("--date-range", default="1d", help="Google News date range (default 1d)")
+    submit.add_argument("--location", default="IN")
+    submit.add_argument("--language", default="en")
+    submit.add_argument("--ingestion", default="html", choices=["html", "rss"])
+    submit.add_argument("--wait", action="store_true", help="wait until every task of the run has finished")
+
+    work = commands.add_parser("work", help="lease and run tasks")
+    work.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    work.add_argument("--processes", type=int, default=1, help="number of worker processes to start")
+    work.add_argument("--batch-size", type=int, default=10, help="resolve and scrape tasks run at once")
+    work.add_argument("--visibility-timeout", type=float, default=300)
+    work.add_argument("--max-attempts", type=int, default=3)
+    work.add_argument("--idle-exit", type=float, help="stop after this many seconds without work")
+    work.add_argument("--no-selenium", action="store_true", help="do not fall back to Selenium for unresolved links")
+    work.add_argument("--extractive", action="store_true", help="summarize extractively instead of with a model")
+    work.add_argument("--engine", default="torch")
+    work.add_argument("--model", help="checkpoint to use instead of the engine's default")
+
+    status = commands.add_parser("status", help="show task counts")
+    status.add_argument("--run-id", help="only count the tasks of this run")
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        gatherer_class = RSSNewsGatherer if args.ingestion == "rss" else NewsGatherer
+        news_gatherer = gatherer_class(args.queries, args.date_range, args.num_urls, None, args.location, args.language)
+        queue = WorkQueue(args.queue)
+        run_id, count = asyncio.run(submit_run(queue, ArticleStore(args.db), news_gatherer))
+        print(f"Run {run_id}: {count} links enqueued")
+        if args.wait:
+            print(json.dumps(wait_for_run(queue, run_id), indent=2))
+    elif args.command == "work":
+        if args.processes == 1:
+            run_worker(args)
+        else:
+            # Spawned processes each open their own database connections and load their own model
+            context = multiprocessing.get_context('spawn')
+            workers = [context.Process(target=run_worker, args=(args,)) for _ in range(args.processes)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+    else:
+        print(json.dumps(WorkQueue(args.queue).stats(args.run_id), indent=2))
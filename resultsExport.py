@@ -0,0 +1,143 @@
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import sys
+from articleStore import ArticleStore
+
+FIELDS = ['title', 'url', 'summary', 'alternate_sources', 'query', 'publisher', 'published_at']
+
+def published_at(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+
+def iter_records(store, run_id, search=None, batch_size=500):
+    """
+    Yield the export records of a run batch by batch, with the alternate sources
+    of each batch looked up in one query. Only one batch is held in memory.
+    """
+    articles = store.iter_articles(run_id, search, batch_size)
+    while True:
+        batch = list(itertools.islice(articles, batch_size))
+        if not batch:
+            return
+        sources = store.alternate_sources(run_id, [article['id'] for article in batch])
+        for article in batch:
+            yield {
+                'title': article['title'],
+                'url': article['resolved_url'] or article['url'],
+                'summary': article['summary'],
+                'alternate_sources': sources.get(article['id'], []),
+                'query': article['query'],
+                'publisher': article['publisher'],
+                'published_at': published_at(article['published_at']),
+            }
+
+def write_csv(records, file):
+    writer = csv.DictWriter(file, fieldnames=FIELDS)
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow({**record, 'alternate_sources': '\n'.join(record['alternate_sources'])})
+        count += 1
+    return count
+
+def write_jsonl(records, file):
+    count = 0
+    for record in records:
+        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+def write_parquet(records, path, row_group_size=500):
+    """
+    Write records as Parquet one row group at a time. Needs the optional pyarrow package.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+    schema = pa.schema([
+        ('title', pa.string()), ('url', pa.string()), ('summary', pa.string()),
+        ('alternate_sources', pa.list_(pa.string())), ('query', pa.string()),
+        ('publisher', pa.string()), ('published_at', pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            batch = list(itertools.islice(records, row_group_size))
+            if not batch:
+                break
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+def write_xlsx(records, path):
+    """
+    Write records as an Excel sheet in xlsxwriter's constant memory mode, which
+    flushes every row to disk as soon as the next one starts.
+    """
+    try:
+        import xlsxwriter
+    except ImportError as e:
+        raise ImportError("Excel export needs xlsxwriter: pip install xlsxwriter") from e
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    sheet = workbook.add_worksheet('Sheet1')
+    headers = ['Title', 'URL', 'Summary', 'Alternate Sources', 'Query', 'Publisher', 'Published At']
+    sheet.write_row(0, 0, headers)
+    count = 0
+    for count, record in enumerate(records, start=1):
+        sheet.write_row(count, 0, [record['title'], record['url'], record['summary'],
+                                   '\n'.join(record['alternate_sources']), record['query'],
+                                   record['publisher'], record['published_at']])
+    workbook.close()
+    return count
+
+# format -> (file extension, MIME type)
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'jsonl': ('jsonl', 'application/x-ndjson'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+def export(store, run_id, export_format, path, search=None):
+    """
+    Stream the summarized articles of a run (optionally only those matching search)
+    into path in the given format, returning the number of articles written.
+    """
+    records = iter_records(store, run_id, search)
+    if export_format == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            return write_csv(records, file)
+    if export_format == 'jsonl':
+        with open(path, 'w', encoding='utf-8') as file:
+            return write_jsonl(records, file)
+    if export_format == 'parquet':
+        return write_parquet(records, path)
+    if export_format == 'xlsx':
+        return write_xlsx(records, path)
+    raise ValueError(f"Unknown export format {export_format!r}, expected one of {', '.join(FORMATS)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the summarized articles of a run.")
+    parser.add_argument("--db", default="sentinel.db", help="article store path")
+    parser.add_argument("--run-id", help="run to export (default is the latest run)")
+    parser.add_argument("--format", default="csv", choices=list(FORMATS))
+    parser.add_argument("--search", help="only export articles whose title, summary or URL contains this")
+    parser.add_argument("--output", default="-", help="output file, or - for standard output (csv and jsonl only)")
+    args = parser.parse_args()
+
+    store = ArticleStore(args.db)
+    run_id = args.run_id or store.latest_run_id()
+    if args.output == "-":
+        writer = {'csv': write_csv, 'jsonl': write_jsonl}.get(args.format)
+        if writer is None:
+            parser.error(f"--format {args.format} needs an --output file")
+        count = writer(iter_records(store, run_id, args.search), sys.stdout)
+    else:
+        count = export(store, run_id, args.format, args.output, args.search)
+    print(f"Exported {count} articles", file=sys.stderr)
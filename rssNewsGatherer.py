@@ -0,0 +1,199 @@
+import asyncio
+import datetime
+import logging
+import math
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+from xml.etree import ElementTree
+import aiohttp
+from googleNewsExtractor import NewsGatherer
+
+class RSSNewsGatherer(NewsGatherer):
+    """
+    Collect Google News article links from the RSS search feed instead of the HTML search page.
+    The feed is a few kB of XML per query, parsed incrementally while it downloads,
+    and each item already carries its headline, publisher and publish time, which
+    are kept as link metadata for the pipeline and the article store.
+    A feed holds at most about 100 items, so when more links per query are asked
+    for the date range is split into after:/before: windows that are fetched newest
+    first until enough links have been found.
+    Same inputs as NewsGatherer, plus:
+    max_windows : int, optional
+        The maximum number of date windows fetched per query (default is 10).
+    chunk_size : int, optional
+        The number of bytes fed to the XML parser at a time (default is 16 kB).
+    """
+    items_per_feed = 100
+    # Days covered by the date ranges the Dashboard offers; 'anytime' is windowed over the last year
+    range_units = {'h': 1 / 24, 'd': 1, 'w': 7, 'm': 30, 'y': 365}
+    anytime_days = 365
+
+    def __init__(self, *args, max_windows=10, chunk_size=16 * 1024, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_windows = max_windows
+        self.chunk_size = chunk_size
+        self.metadata = {}
+
+    def range_days(self):
+        date_of_news = self.date_of_news.lower()
+        if date_of_news == "anytime":
+            return self.anytime_days
+        try:
+            return int(date_of_news[:-1]) * self.range_units[date_of_news[-1]]
+        except (ValueError, KeyError):
+            logging.warning(f"Unknown date range {self.date_of_news!r}, fetching a single feed page")
+            return 0
+
+    def date_windows(self, today=None):
+        """
+        Return the (after, before) date windows to fetch, newest first, or [None]
+        when a single feed page is enough for number_of_urls_per_query.
+        """
+        pages = math.ceil(self.number_of_urls_per_query / self.items_per_feed)
+        days = int(self.range_days())
+        if pages <= 1 or days < 2:
+            return [None]
+        # Windows are whole days; asking for twice the pages strictly needed covers sparse windows
+        count = min(days, 2 * pages, self.max_windows)
+        today = today or datetime.date.today()
+        bounds = [today + datetime.timedelta(days=1) - datetime.timedelta(days=round(days * i / count))
+                  for i in range(count + 1)]
+        return [(bounds[i + 1], bounds[i]) for i in range(count)]
+
+    def build_feed_url(self, search_query, window=None):
+        if window is not None:
+            after, before = window
+            search_query = f"{search_query} after:{after.isoformat()} before:{before.isoformat()}"
+        elif self.date_of_news.lower() != "anytime":
+            search_query = f"{search_query} when:{self.date_of_news}"
+        params = {
+            'q': search_query,
+            'hl': self.language,
+            'gl': self.location,
+            'ceid': f"{self.location}:{self.language}",
+        }
+        return f"{self.base_url}/rss/search?{urlencode(params)}"
+
+    @staticmethod
+    def parse_item(element):
+        """
+        Turn an RSS <item> element into a dict with link, title, publisher and published_at.
+        """
+        publisher = (element.findtext('source') or '').strip() or None
+        title = (element.findtext('title') or '').strip()
+        # Google News appends " - Publisher" to every headline
+        if publisher and title.endswith(f" - {publisher}"):
+            title = title[:-len(publisher) - 3]
+        published_at = None
+        if element.findtext('pubDate'):
+            try:
+                published_at = parsedate_to_datetime(element.findtext('pubDate')).timestamp()
+            except (TypeError, ValueError):
+                pass
+        return {
+            'link': (element.findtext('link') or '').strip(),
+            'title': title or None,
+            'publisher': publisher,
+            'published_at': published_at,
+        }
+
+    def read_items(self, parser, data):
+        """
+        Feed data to the pull parser and return the items completed by it.
+        Finished items are cleared, so memory stays flat however long the feed is.
+        """
+        parser.feed(data)
+        items = []
+        for _, element in parser.read_events():
+            if element.tag == 'item':
+                item = self.parse_item(element)
+                if item['link']:
+                    items.append(item)
+                element.clear()
+        return items
+
+    @staticmethod
+    def add_new_items(found, items, seen, limit):
+        """
+        Append to found the items whose link is not in seen, up to limit items in
+        found, adding their links to seen.
+        """
+        for item in items:
+            if len(found) >= limit:
+                break
+            if item['link'] not in seen:
+                seen.add(item['link'])
+                found.append(item)
+
+    async def fetch_feed(self, session, url, limit, seen=None):
+        """
+        Return the items of one feed page whose links are not in seen (a set that
+        is updated), reading no further than limit such items when the feed is
+        streamed from the network.
+        """
+        headers = {'User-Agent': random.choice(self.user_agents)}
+        parser = ElementTree.XMLPullParser(events=('end',))
+        seen = set() if seen is None else seen
+        items = []
+        try:
+            async with self.semaphore:
+                if self.http_cache is None or not self.http_cache.is_fresh(url):
+                    await self.rate_limiter.wait(url)
+                with self.metrics.timer('gather.fetch_seconds'):
+                    if self.http_cache is not None:
+                        # Cached feeds are stored whole, then parsed in one go
+                        _, status, body = await self.http_cache.fetch(session, url, 'search', headers,
+                                                                      metrics=self.metrics)
+                        if status >= 400:
+                            logging.error(f"Request failed: HTTP {status} for {url}")
+                            self.metrics.increment('gather.fetch_errors')
+                            return []
+                        self.add_new_items(items, self.read_items(parser, body), seen, limit)
+                    else:
+                        async with session.get(url, headers=headers) as response:
+                            response.raise_for_status()
+                            async for chunk in response.content.iter_chunked(self.chunk_size):
+                                self.add_new_items(items, self.read_items(parser, chunk), seen, limit)
+                                if len(items) >= limit:
+                                    break
+            self.metrics.increment('gather.pages_fetched')
+        except aiohttp.ClientError as e:
+            logging.error(f"Request failed: {e}")
+            self.metrics.increment('gather.fetch_errors')
+        except ElementTree.ParseError as e:
+            logging.error(f"Malformed feed {url}: {e}")
+            self.metrics.increment('gather.fetch_errors')
+        return items
+
+    async def gather_news_links(self, search_query, session=None):
+        if session is None:
+            async with self.open_session() as session:
+                return await self.gather_news_links(search_query, session)
+
+        links = []
+        seen = set()
+        for window in self.date_windows():
+            needed = self.number_of_urls_per_query - len(links)
+            # Only links new to this query count towards needed, so overlapping windows still fill up
+            for item in await self.fetch_feed(session, self.build_feed_url(search_query, window), needed, seen):
+                self.metadata[item['link']] = {key: item[key] for key in ('title', 'publisher', 'published_at')}
+                links.append(item['link'])
+            self.metrics.increment('gather.feed_windows')
+            if len(links) >= self.number_of_urls_per_query:
+                break
+        return links[:self.number_of_urls_per_query]
+
+    def link_metadata(self, link):
+        return self.metadata.get(link, {})
+
+# test run
+if __name__ == "__main__":
+    start = time.time()
+    news_gatherer = RSSNewsGatherer(['Artificial intelligence'], "1y", 150, "links_test.txt", "IN", "en")
+    asyncio.run(news_gatherer.gather_and_save_news())
+    for link, metadata in list(news_gatherer.metadata.items())[:5]:
+        print(metadata['publisher'], metadata['title'], link)
+    end = time.time()
+    print(f"Time taken: {end - start} seconds")
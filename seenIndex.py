@@ -0,0 +1,78 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+class SeenIndex:
+    """
+    Persistent set of links and URLs that have already been processed.
+    Items are stored as 64-bit BLAKE2b digests in a SQLite table keyed by
+    (kind, digest), so lookups stay a single index probe however many
+    articles have been seen. Failed attempts at items that may succeed later are
+    counted in a second table, so callers can give up on them after a few tries.
+    Inputs:
+    path : str, optional
+        The file path of the index database (default is seen_index.db).
+    """
+    def __init__(self, path='seen_index.db'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "kind TEXT NOT NULL, digest INTEGER NOT NULL, first_seen REAL NOT NULL, "
+                "PRIMARY KEY (kind, digest)) WITHOUT ROWID"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS failures ("
+                "kind TEXT NOT NULL, digest INTEGER NOT NULL, attempts INTEGER NOT NULL, last_failed_at REAL NOT NULL, "
+                "PRIMARY KEY (kind, digest)) WITHOUT ROWID"
+            )
+
+    @staticmethod
+    def digest(item):
+        return int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+    def contains(self, kind, item):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM seen WHERE kind = ? AND digest = ?", (kind, self.digest(item))
+            ).fetchone()
+        return row is not None
+
+    def add(self, kind, item):
+        """
+        Mark item as seen and return True if it was new.
+        """
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO seen (kind, digest, first_seen) VALUES (?, ?, ?)",
+                (kind, self.digest(item), time.time())
+            )
+        return cursor.rowcount == 1
+
+    def record_failure(self, kind, item):
+        """
+        Count a failed attempt at item and return its number of failed attempts so far.
+        """
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO failures (kind, digest, attempts, last_failed_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (kind, digest) DO UPDATE SET attempts = attempts + 1, last_failed_at = excluded.last_failed_at",
+                (kind, self.digest(item), time.time())
+            )
+            return self.connection.execute(
+                "SELECT attempts FROM failures WHERE kind = ? AND digest = ?", (kind, self.digest(item))
+            ).fetchone()[0]
+
+    def count(self, kind=None):
+        with self.lock:
+            if kind is None:
+                return self.connection.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+            return self.connection.execute("SELECT COUNT(*) FROM seen WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -1,16 +1,123 @@
-from transformers import BartForConditionalGeneration, BartTokenizer
 import re
 import logging
+import threading
 import time
+from metrics import default_metrics
+from summaryBackends import decoding_profile, default_model, load_engine
+from summaryCache import SummaryCache
+from summaryWorkers import get_worker_pool
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+DEFAULT_MODEL = default_model('torch')
+
+_model_cache = {}
+_model_cache_lock = threading.Lock()
+
+def load_model(model_name=None, engine='torch'):
+    """
+    Load the tokenizer and model for model_name with the given engine (see
+    summaryBackends.ENGINES) once per process and return the shared
+    (tokenizer, model) pair. transformers is only imported on first use.
+    """
+    model_name = model_name or default_model(engine)
+    with _model_cache_lock:
+        if (engine, model_name) not in _model_cache:
+            _model_cache[(engine, model_name)] = load_engine(engine, model_name)
+        return _model_cache[(engine, model_name)]
+
+def register_model(model_name, tokenizer, model, engine='torch'):
+    """
+    Put an already loaded (tokenizer, model) pair in the process-wide cache,
+    e.g. a stub model for benchmarks.
+    """
+    with _model_cache_lock:
+        _model_cache[(engine, model_name)] = (tokenizer, model)
+
+def warm_up(model_name=None, engine='torch'):
+    """
+    Load the model and run one short generation so the first real request does
+    not pay for weight loading and lazy initialisation.
+    """
+    start = time.time()
+    tokenizer, model = load_model(model_name, engine)
+    inputs = tokenizer(["SENTINEL warm-up."], return_tensors='pt')
+    model.generate(inputs['input_ids'], attention_mask=inputs['attention_mask'], max_length=8, num_beams=1)
+    logging.info(f"Warmed up {model_name or default_model(engine)} in {time.time() - start:.2f} seconds")
+
 class ArticleSummarizer:
-    def __init__(self, input_file, output_file):
+    """
+    Summarize the articles in a scraped content file with BART.
+    Inputs:
+    input_file : str
+        The file path to the scraped content (Content.txt).
+    output_file : str
+        The file path to save the summaries.
+    batch_size : int, optional
+        The number of articles passed to model.generate at once (default is 8).
+        Articles are sorted by token length before batching, so each batch only
+        pads up to its longest member. Use 1 to summarize one article at a time.
+    max_chunks : int, optional
+        The maximum number of chunks a long article is split into (default is 4).
+        Articles longer than the model's 1024-token window are split on sentence
+        boundaries, the chunks are summarized together and the partial summaries
+        are summarized again. Text past the last chunk is dropped, so the cost per
+        article is at most max_chunks + 1 inputs. Use 1 to truncate instead.
+    model_name : str, optional
+        The Hugging Face checkpoint to use (default is the engine's default checkpoint,
+        facebook/bart-large-cnn for all engines but distilbart).
+        The model is loaded once per process and shared by all summarizers.
+    engine : str, optional
+        The inference engine: 'torch', 'torch-int8' (dynamically quantized),
+        'onnx' (ONNX Runtime) or 'distilbart' (default is 'torch').
+    decoding : str, optional
+        The name of a decoding profile in summaryBackends.DECODING_PROFILES:
+        'legacy', 'deterministic', 'quality beam' or 'fast greedy' (default is 'legacy').
+    prefilter : ExtractiveSummarizer, optional
+        If set (hybrid mode), articles longer than the input window are first cut
+        down to their most salient sentences that fit in it, instead of being
+        chunked or truncated (default is None).
+    cache : SummaryCache, optional
+        A summary cache to consult before running the model (default is None).
+        Articles already summarized with the same model and settings skip inference.
+    metrics : Metrics, optional
+        The registry generation timings, token counts and cache hits are recorded in
+        (default is metrics.default_metrics).
+    num_workers : int, optional
+        The number of worker processes the model runs in (default is 1, in this process).
+        With more than one, each worker loads the model once and uncached articles are
+        spread over them by a shared SummaryWorkerPool; the model is not loaded here.
+    threads_per_worker : int, optional
+        The torch threads used by each worker process (default is the CPU count divided
+        by num_workers). Ignored when num_workers is 1.
+    """
+    max_input_length = 1024
+    error_summary = "Error generating summary."
+
+    def __init__(self, input_file=None, output_file=None, batch_size=8, max_chunks=4, model_name=None, cache=None,
+                 metrics=None, num_workers=1, threads_per_worker=None, engine='torch', decoding='legacy',
+                 prefilter=None):
         self.input_file = input_file
         self.output_file = output_file
-        self.tokenizer = BartTokenizer.from_pretrained('facebook/bart-large-cnn')
-        self.model = BartForConditionalGeneration.from_pretrained('facebook/bart-large-cnn')
+        self.batch_size = max(1, batch_size)
+        self.max_chunks = max(1, max_chunks)
+        self.engine = engine
+        self.model_name = model_name or default_model(engine)
+        self.decoding = decoding
+        self.generation_kwargs = decoding_profile(decoding)
+        self.cache = cache
+        self.prefilter = prefilter
+        self.metrics = metrics or default_metrics
+        self.num_workers = max(1, num_workers)
+        self.worker_pool = None
+        self.tokenizer = self.model = None
+        if self.num_workers > 1:
+            self.worker_pool = get_worker_pool(
+                self.num_workers, threads_per_worker, batch_size=self.batch_size, max_chunks=self.max_chunks,
+                model_name=self.model_name, engine=engine, decoding=decoding,
+            )
+        else:
+            self.tokenizer, self.model = load_model(self.model_name, engine)
 
     @staticmethod
     def clean_text(text):
@@ -18,48 +125,204 @@ class ArticleSummarizer:
         return text.strip()
 
     def summarize_text(self, text):
-        try:
-            inputs = self.tokenizer.encode(text, return_tensors='pt', max_length=1024, truncation=True)
-            summary_ids = self.model.generate(
-                inputs, 
-                max_length=150, 
-                min_length=50, 
-                length_penalty=2.0, 
-                num_beams=4, 
-                early_stopping=True,
-                do_sample=True,
-                top_k=50,
-                top_p=0.95
-            )
-            summary = self.tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-            return summary
-        except Exception as e:
-            logging.error(f"Error summarizing text: {e}")
-            return "Error generating summary."
+        return self.summarize_batch([text])[0]
 
-    def summarize_articles(self):
-        try:
-            with open(self.input_file, 'r', encoding='utf-8') as file:
-                content = file.read()
-        except FileNotFoundError:
-            logging.error(f"Input file {self.input_file} not found.")
-            return
+    def length_buckets(self, input_ids):
+        """
+        Group tokenized inputs into batches of similar length.
+        Returns lists of indices into input_ids, shortest inputs first.
+        """
+        order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def split_into_chunks(self, text):
+        """
+        Split a long text on sentence boundaries into at most max_chunks pieces
+        that each fit in the model's input window.
+        """
+        sentences = re.split(r'(?<=[.!?])\s+', text)
+        lengths = [len(ids) for ids in self.tokenizer(sentences, add_special_tokens=False)['input_ids']]
+        budget = self.max_input_length - 2  # leave room for <s> and </s>
+
+        chunks = []
+        current, current_length = [], 0
+        for sentence, length in zip(sentences, lengths):
+            if current and current_length + length > budget:
+                chunks.append(' '.join(current))
+                current, current_length = [], 0
+                if len(chunks) == self.max_chunks:
+                    break
+            current.append(sentence)
+            current_length += length
+        else:
+            if current:
+                chunks.append(' '.join(current))
+        return chunks
+
+    def generate_summaries(self, input_ids):
+        """
+        Run model.generate over tokenized inputs in length buckets, returning the
+        decoded summaries in input order.
+        """
+        summaries = [None] * len(input_ids)
+        for bucket in self.length_buckets(input_ids):
+            try:
+                batch = self.tokenizer.pad({'input_ids': [input_ids[i] for i in bucket]}, return_tensors='pt')
+                with self.metrics.timer('summarize.generate_seconds'):
+                    summary_ids = self.model.generate(
+                        batch['input_ids'],
+                        attention_mask=batch['attention_mask'],
+                        **self.generation_kwargs
+                    )
+                decoded = self.tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+                self.metrics.increment('summarize.tokens_in', sum(len(input_ids[i]) for i in bucket))
+                self.metrics.increment('summarize.tokens_out', sum(len(ids) for ids in summary_ids))
+            except Exception as e:
+                logging.error(f"Error summarizing text: {e}")
+                self.metrics.increment('summarize.errors', len(bucket))
+                decoded = [self.error_summary] * len(bucket)
+            for i, summary in zip(bucket, decoded):
+                summaries[i] = summary
+        return summaries
 
-        articles = content.split('Source ')
-        summaries = []
+    def cache_settings(self):
+        return {
+            'engine': self.engine,
+            'generation': self.generation_kwargs,
+            'max_input_length': self.max_input_length,
+            'max_chunks': self.max_chunks,
+            'prefilter': self.prefilter is not None,
+        }
 
-        for article in articles:
+    def summarize_batch(self, texts):
+        """
+        Summarize a list of texts, returning the summaries in the same order.
+        Texts found in the summary cache are not run through the model.
+        """
+        texts = list(texts)
+        self.metrics.increment('summarize.articles', len(texts))
+        if self.cache is None:
+            return self.summarize_uncached(self.condense(texts))
+
+        settings = self.cache_settings()
+        keys = [self.cache.make_key(text, self.model_name, settings) for text in texts]
+        summaries = self.cache.get_many(keys)
+        # Identical bodies in one batch (overlapping queries) share a key and go through the model once
+        first_index = {}
+        for i, key in enumerate(keys):
+            first_index.setdefault(key, i)
+        missing = [key for key in first_index if key not in summaries]
+        if missing:
+            fresh = self.summarize_uncached(self.condense([texts[first_index[key]] for key in missing]))
+            self.cache.put_many([(key, summary) for key, summary in zip(missing, fresh) if summary != self.error_summary])
+            summaries.update(zip(missing, fresh))
+        self.metrics.increment('summarize.cache_hits', len(texts) - len(missing))
+        self.metrics.increment('summarize.cache_misses', len(missing))
+        logging.info(f"Summary cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+        return [summaries[key] for key in keys]
+
+    def token_lengths(self, sentences):
+        return [len(ids) for ids in self.tokenizer(sentences, add_special_tokens=False)['input_ids']]
+
+    def condense(self, texts):
+        """
+        Apply the extractive pre-filter, if any, so every text fits in the input window.
+        """
+        if self.prefilter is None:
+            return texts
+        # Without a local tokenizer (worker pool), budget in words, which run shorter than tokens
+        measure = self.token_lengths if self.tokenizer is not None else None
+        budget = self.max_input_length - 2 if measure else int(self.max_input_length * 0.7)
+        return self.prefilter.condense(texts, budget, measure)
+
+    def summarize_uncached(self, texts):
+        """
+        Run the model over a list of texts, returning the summaries in the same order.
+        Texts that do not fit in the input window are summarized chunk by chunk
+        (map) and the partial summaries are then summarized again (reduce).
+        """
+        if not texts:
+            return []
+        if self.worker_pool is not None:
+            return self.worker_pool.summarize(texts, self.error_summary, self.metrics)
+
+        truncate = self.max_chunks == 1
+        input_ids = self.tokenizer(texts, max_length=self.max_input_length, truncation=truncate)['input_ids']
+
+        # Map: one input per short text, one input per chunk for long texts, all in one batched run
+        map_ids, owners = [], []
+        for i, ids in enumerate(input_ids):
+            if len(ids) <= self.max_input_length:
+                map_ids.append(ids)
+                owners.append(i)
+            else:
+                chunks = self.split_into_chunks(texts[i])
+                map_ids.extend(self.tokenizer(chunks, max_length=self.max_input_length, truncation=True)['input_ids'])
+                owners.extend([i] * len(chunks))
+
+        partials = [[] for _ in texts]
+        for owner, summary in zip(owners, self.generate_summaries(map_ids)):
+            partials[owner].append(summary)
+
+        # Reduce: summarize the joined partial summaries of every chunked text
+        summaries = [parts[0] if len(parts) == 1 else None for parts in partials]
+        reduce_idx = [i for i, parts in enumerate(partials) if len(parts) > 1]
+        for i in reduce_idx:
+            if self.error_summary in partials[i]:
+                summaries[i] = self.error_summary
+        reduce_idx = [i for i in reduce_idx if summaries[i] is None]
+        if reduce_idx:
+            joined = [' '.join(partials[i]) for i in reduce_idx]
+            reduce_ids = self.tokenizer(joined, max_length=self.max_input_length, truncation=True)['input_ids']
+            for i, summary in zip(reduce_idx, self.generate_summaries(reduce_ids)):
+                summaries[i] = summary
+        return summaries
+
+    def load_articles(self):
+        return self.read_articles(self.input_file)
+
+    @classmethod
+    def read_articles(cls, input_file):
+        """
+        Read a content file and return the cleaned body of each article, in file order.
+        """
+        with open(input_file, 'r', encoding='utf-8') as file:
+            content = file.read()
+
+        bodies = []
+        # Only split on the "Source N: url" headers, not on "Source " inside article text
+        for article in re.split(r'^Source \d+: ', content, flags=re.M):
             if not article.strip():
                 continue
 
-            parts = article.split('Text: ', 1)
-            if len(parts) < 2:
+            body = cls.article_body(article)
+            if body is None:
                 logging.warning(f"Article missing text body: {article[:50]}...")
                 continue
 
-            article_body = self.clean_text(parts[1])
-            summary = self.summarize_text(article_body)
-            summaries.append(summary)
+            bodies.append(body)
+        return bodies
+
+    @classmethod
+    def article_body(cls, article):
+        """
+        Return the cleaned text of one scraped article ("Title: ..." / "Text: ..." lines),
+        or None if it has no text.
+        """
+        parts = article.split('Text: ', 1)
+        if len(parts) < 2:
+            return None
+        return cls.clean_text(parts[1])
+
+    def summarize_articles(self):
+        try:
+            bodies = self.load_articles()
+        except FileNotFoundError:
+            logging.error(f"Input file {self.input_file} not found.")
+            return
+
+        with self.metrics.stage('summarize'):
+            summaries = self.summarize_batch(bodies)
 
         try:
             with open(self.output_file, 'w', encoding='utf-8') as file:
@@ -73,7 +336,7 @@ if __name__ == "__main__":
     start = time.time()
     input_file = "Content.txt"
     output_file = "summaries.txt"
-    summarizer = ArticleSummarizer(input_file, output_file)
+    summarizer = ArticleSummarizer(input_file, output_file, cache=SummaryCache())
     summarizer.summarize_articles()
     logging.info(f"Summaries process completed.")
     end = time.time()
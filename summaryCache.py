@@ -0,0 +1,102 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+class SummaryCache:
+    """
+    Persistent, content-addressed cache of article summaries backed by SQLite.
+    Entries are keyed by a hash of the cleaned article body plus the model name
+    and generation settings, so changing either never returns a stale summary.
+    Inputs:
+    path : str, optional
+        The file path of the cache database (default is summary_cache.sqlite3).
+    max_entries : int, optional
+        The maximum number of summaries kept; the least recently used entries are
+        evicted beyond this (default is 10000).
+    max_age_days : float, optional
+        Entries not used for longer than this are evicted (default is None, no age limit).
+    """
+    def __init__(self, path='summary_cache.sqlite3', max_entries=10000, max_age_days=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at)")
+
+    @staticmethod
+    def make_key(text, model_name, settings):
+        header = json.dumps({'model': model_name, 'settings': settings}, sort_keys=True)
+        return hashlib.sha256(f"{header}\0{text}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """
+        Look up several keys at once and return a dict of the ones found.
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self.lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.connection.execute(
+                    f"SELECT key, summary, accessed_at FROM summaries WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, summary, accessed_at in rows:
+                    if self.max_age_days is None or now - accessed_at <= self.max_age_days * 86400:
+                        found[key] = summary
+            with self.connection:
+                self.connection.executemany(
+                    "UPDATE summaries SET accessed_at = ? WHERE key = ?", [(now, key) for key in found]
+                )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """
+        Store (key, summary) pairs and evict old entries if the cache is over its limits.
+        """
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, summary, now, now) for key, summary in items]
+            )
+            self.evict(now)
+
+    def evict(self, now=None):
+        now = now or time.time()
+        if self.max_age_days is not None:
+            self.connection.execute("DELETE FROM summaries WHERE accessed_at < ?", (now - self.max_age_days * 86400,))
+        if self.max_entries is not None:
+            self.connection.execute(
+                "DELETE FROM summaries WHERE key IN "
+                "(SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+            }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,128 @@
+import atexit
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Per-process summarizer, created once by the pool initializer in every worker
+_worker_summarizer = None
+
+def _init_worker(threads, summarizer_options):
+    global _worker_summarizer
+    import torch
+    from summarizer import ArticleSummarizer
+    torch.set_num_threads(threads)
+    _worker_summarizer = ArticleSummarizer(**summarizer_options)
+    logging.info(f"Summary worker {os.getpid()} ready with {threads} threads")
+
+def _summarize_chunk(texts):
+    from metrics import Metrics
+    metrics = Metrics()
+    _worker_summarizer.metrics = metrics
+    return _worker_summarizer.summarize_uncached(texts), metrics.snapshot()
+
+class SummaryWorkerPool:
+    """
+    Run summarization in several worker processes, each holding its own copy of
+    the model and its own torch thread pool, so many-core machines are kept busy
+    on short articles where a single generate() call cannot use every core.
+    Texts are split into chunks of at most batch_size, spread over the workers and the
+    summaries are returned in input order. If a worker dies (e.g. killed for
+    running out of memory) the pool is restarted and the unfinished chunks are
+    submitted again.
+    Workers are started with the spawn method and load their model with
+    summarizer.load_model, so models put in the cache with register_model are
+    not available to them.
+    Inputs:
+    num_workers : int
+        The number of worker processes.
+    threads_per_worker : int, optional
+        The torch intra-op threads per worker (default is the CPU count divided by num_workers).
+    max_restarts : int, optional
+        The number of pool restarts per summarize call before the remaining chunks
+        are given up on (default is 3).
+    summarizer_options
+        Keyword arguments for the ArticleSummarizer of every worker (batch_size,
+        max_chunks, model_name, engine, decoding).
+    """
+    def __init__(self, num_workers, threads_per_worker=None, max_restarts=3, **summarizer_options):
+        self.num_workers = max(1, num_workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.summarizer_options = summarizer_options
+        self.batch_size = max(1, summarizer_options.get('batch_size', 8))
+        self.max_restarts = max_restarts
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def start(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.threads_per_worker, self.summarizer_options),
+                )
+            return self.executor
+
+    def restart(self, broken):
+        with self.lock:
+            if self.executor is broken:
+                logging.warning("Summary worker died, restarting the worker pool")
+                broken.shutdown(wait=False, cancel_futures=True)
+                self.executor = None
+        return self.start()
+
+    def summarize(self, texts, error_summary, metrics=None):
+        """
+        Summarize texts on the workers, returning the summaries in input order.
+        The counters and timings recorded by the workers are merged into metrics.
+        """
+        texts = list(texts)
+        # Keep every worker busy on small inputs instead of filling one batch
+        chunk_size = max(1, min(self.batch_size, math.ceil(len(texts) / self.num_workers)))
+        chunks = {start: texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)}
+        summaries = [error_summary] * len(texts)
+        restarts = 0
+        while chunks:
+            executor = self.start()
+            try:
+                futures = {start: executor.submit(_summarize_chunk, chunk) for start, chunk in chunks.items()}
+                for start, future in futures.items():
+                    chunk_summaries, snapshot = future.result()
+                    summaries[start:start + len(chunk_summaries)] = chunk_summaries
+                    if metrics is not None:
+                        metrics.merge(snapshot)
+                    del chunks[start]
+            except BrokenProcessPool:
+                restarts += 1
+                if restarts > self.max_restarts:
+                    logging.error(f"Giving up on {len(chunks)} chunks after {self.max_restarts} worker pool restarts")
+                    break
+                self.restart(executor)
+        return summaries
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.executor = None
+
+_shared_pools = {}
+_shared_pools_lock = threading.Lock()
+
+def get_worker_pool(num_workers, threads_per_worker=None, **summarizer_options):
+    """
+    Return the process-wide SummaryWorkerPool for these settings, creating it on
+    first use, so repeated runs reuse workers that already have the model loaded.
+    """
+    key = (num_workers, threads_per_worker, tuple(sorted(summarizer_options.items())))
+    with _shared_pools_lock:
+        if key not in _shared_pools:
+            pool = SummaryWorkerPool(num_workers, threads_per_worker, **summarizer_options)
+            atexit.register(pool.close)
+            _shared_pools[key] = pool
+        return _shared_pools[key]
@@ -0,0 +1,26 @@
+from extractiveSummarizer import ExtractiveSummarizer
+
+def long_sentence(word, count):
+    return ' '.join([word] * count) + '.'
+
+def test_condense_keeps_salient_sentences_within_budget():
+    text = ' '.join(long_sentence(word, 10) for word in ['alpha', 'beta', 'gamma', 'delta'])
+    condensed, = ExtractiveSummarizer().condense([text], budget=25)
+    assert condensed
+    assert len(condensed.split()) <= 25
+
+def test_condense_returns_short_texts_unchanged():
+    text = "The council approved the new budget on Monday. Officials expect the plan to pass."
+    assert ExtractiveSummarizer().condense([text], budget=100) == [text]
+
+def test_condense_truncates_when_no_sentence_fits():
+    text = long_sentence('markets', 900) + ' ' + long_sentence('officials', 900)
+    condensed, = ExtractiveSummarizer().condense([text], budget=500)
+    assert condensed
+    assert 0 < len(condensed.split()) <= 500
+
+def test_condense_truncates_text_without_punctuation():
+    text = ' '.join(['word'] * 2000)
+    condensed, = ExtractiveSummarizer().condense([text], budget=300, measure=lambda sentences: [len(s) for s in sentences])
+    assert condensed
+    assert len(condensed) <= 300
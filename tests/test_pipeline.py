@@ -0,0 +1,99 @@
+import asyncio
+from contextlib import asynccontextmanager
+from pipeline import NewsPipeline
+from seenIndex import SeenIndex
+
+class StubGatherer:
+    search_queries = ['query']
+    date_of_news = '1d'
+    location = 'US'
+    language = 'en'
+
+    def __init__(self, links):
+        self.links = links
+        self.total_number_of_urls = len(links)
+        self.gathered = []
+
+    async def iter_news_links(self, is_new=None):
+        for link in self.links:
+            if is_new is None or is_new(link):
+                self.gathered.append(link)
+                yield 'query', link
+
+    def link_metadata(self, link):
+        return {}
+
+class StubResolver:
+    max_concurrency = 2
+
+    @asynccontextmanager
+    async def open_session(self):
+        yield None
+
+    async def resolve_with_fallback(self, session, link):
+        return link.replace('news://', 'https://')
+
+    def save_cache(self):
+        pass
+
+class StubScraper:
+    """
+    Pages under /forbidden/ answer 403 and pages under /down/ fail to download.
+    """
+    max_concurrency = 2
+
+    @asynccontextmanager
+    async def open_session(self):
+        yield None
+
+    async def extract_data_async(self, session, url):
+        if '/forbidden/' in url:
+            return None, None, True
+        if '/down/' in url:
+            return None, None, False
+        return 'Title', f"Title: Title\nText: Body of {url}.", False
+
+class StubSummarizer:
+    batch_size = 4
+    error_summary = "Error generating summary."
+
+    @staticmethod
+    def article_body(content):
+        return content.split('Text: ', 1)[1]
+
+    def summarize_batch(self, texts):
+        return [f"Summary: {text}" for text in texts]
+
+def run_cycle(seen_index, links):
+    gatherer = StubGatherer(links)
+    articles = asyncio.run(NewsPipeline(gatherer, StubResolver(), StubScraper(), StubSummarizer(),
+                                        seen_index=seen_index).run())
+    return gatherer.gathered, articles
+
+def test_summarized_and_forbidden_links_are_not_gathered_again(tmp_path):
+    seen_index = SeenIndex(str(tmp_path / 'seen.db'))
+    links = ['news://example.com/ok/1', 'news://example.com/forbidden/2']
+    gathered, articles = run_cycle(seen_index, links)
+    assert gathered == links
+    assert len(articles) == 1
+
+    gathered, articles = run_cycle(seen_index, links + ['news://example.com/ok/3'])
+    assert gathered == ['news://example.com/ok/3']
+
+def test_temporary_failures_are_retried_up_to_max_attempts(tmp_path):
+    seen_index = SeenIndex(str(tmp_path / 'seen.db'))
+    links = ['news://example.com/down/1']
+    for _ in range(3):
+        gathered, articles = run_cycle(seen_index, links)
+        assert gathered == links
+        assert articles == []
+    gathered, _ = run_cycle(seen_index, links)
+    assert gathered == []
+
+def test_links_resolving_to_a_seen_url_are_marked_seen(tmp_path):
+    seen_index = SeenIndex(str(tmp_path / 'seen.db'))
+    seen_index.add('url', 'https://example.com/ok/1')
+    gathered, articles = run_cycle(seen_index, ['news://example.com/ok/1'])
+    assert articles == []
+    gathered, _ = run_cycle(seen_index, ['news://example.com/ok/1'])
+    assert gathered == []
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+import pytest
+from articleStore import ArticleStore
+from queueWorker import QueueWorker, submit_run
+from workQueue import WorkQueue
+
+class StubGatherer:
+    search_queries = ['query']
+    date_of_news = '1d'
+    location = 'US'
+    language = 'en'
+
+    def __init__(self, links):
+        self.links = links
+        self.total_number_of_urls = len(links)
+
+    async def iter_news_links(self, is_new=None):
+        for link in self.links:
+            yield 'query', link
+
+    def link_metadata(self, link):
+        return {'title': 'Gathered title'}
+
+class StubResolver:
+    @asynccontextmanager
+    async def open_session(self):
+        yield None
+
+    async def resolve_with_fallback(self, session, link):
+        return link.replace('news://', 'https://')
+
+    def save_cache(self):
+        pass
+
+class StubScraper:
+    """
+    Returns pages with a title numbered by call, failing to download each page
+    the first time it is asked for when fail_first is set.
+    """
+    def __init__(self, fail_first=True):
+        self.fail_first = fail_first
+        self.calls = {}
+
+    @asynccontextmanager
+    async def open_session(self):
+        yield None
+
+    async def extract_data_async(self, session, url):
+        self.calls[url] = self.calls.get(url, 0) + 1
+        if self.fail_first and self.calls[url] == 1:
+            return None, None, False
+        title = f"Title {self.calls[url]}"
+        return title, f"Title: {title}\nText: Body of {url}.", False
+
+class StubSummarizer:
+    batch_size = 4
+
+    def summarize_batch(self, texts):
+        return [f"Summary: {text}" for text in texts]
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(str(tmp_path / 'sentinel.db'))
+    yield store
+    store.close()
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), visibility_timeout=0.2, retry_delay=0)
+    yield queue
+    queue.close()
+
+def make_worker(queue, store, worker_id='worker-a', scraper=None):
+    return QueueWorker(queue, store, worker_id=worker_id, poll_interval=0.05, link_resolver=StubResolver(),
+                       scraper=scraper or StubScraper(), summarizer=StubSummarizer())
+
+def test_worker_runs_every_stage_and_retries_scrape(queue, store):
+    run_id, count = asyncio.run(submit_run(queue, store, StubGatherer(['news://example.com/1'])))
+    assert count == 1
+
+    start = time.time()
+    asyncio.run(make_worker(queue, store).run(idle_timeout=0.5))
+    assert time.time() - start < 5
+
+    article, = store.articles(run_id, summarized_only=False)
+    assert article['resolved_url'] == 'https://example.com/1'
+    assert article['title'] == 'Title 2'
+    assert article['summary'] == 'Summary: Body of https://example.com/1.'
+    assert queue.stats(run_id) == {'resolve': {'done': 1}, 'scrape': {'done': 1}, 'summarize': {'done': 1}}
+    attempts, = queue.connection.execute("SELECT attempts FROM tasks WHERE stage = 'scrape'").fetchone()
+    assert attempts == 2
+
+def test_lost_lease_rewrites_the_same_row_and_adds_no_follow_up(queue, store):
+    run_id = store.start_run(['query'])
+    article_id = store.add_link(run_id, 0, 'news://example.com/1', 'query')
+    queue.put('scrape', run_id, article_id, {'url': 'https://example.com/1'})
+    scraper = StubScraper(fail_first=False)
+    worker_a = make_worker(queue, store, 'worker-a', scraper)
+    worker_b = make_worker(queue, store, 'worker-b', scraper)
+
+    stale, = queue.lease(['scrape'], 'worker-a')
+    time.sleep(0.3)
+    task, = queue.lease(['scrape'], 'worker-b')
+    worker_a.finish(stale, asyncio.run(worker_a.scrape(None, stale)))
+    assert worker_a.metrics.snapshot()['counters']['queue.leases_lost'] == 1
+    assert queue.stats(run_id) == {'scrape': {'leased': 1}}
+
+    worker_b.finish(task, asyncio.run(worker_b.scrape(None, task)))
+    assert queue.stats(run_id) == {'scrape': {'done': 1}, 'summarize': {'ready': 1}}
+    article, = store.articles(run_id, summarized_only=False)
+    assert article['id'] == article_id
+    assert article['title'] == 'Title 2'
@@ -0,0 +1,92 @@
+import asyncio
+import datetime
+from contextlib import asynccontextmanager
+from xml.etree import ElementTree
+from googleNewsExtractor import HostRateLimiter
+from rssNewsGatherer import RSSNewsGatherer
+
+def make_gatherer(date_of_news='1m', number_of_urls=250, **kwargs):
+    return RSSNewsGatherer(['q'], date_of_news, number_of_urls, None, 'US', 'en', **kwargs)
+
+def test_parse_item_strips_publisher_suffix():
+    element = ElementTree.fromstring(
+        "<item><title>Headline - Example News</title><link>https://news.example/a</link>"
+        "<source url='https://example.com'>Example News</source>"
+        "<pubDate>Mon, 06 Jan 2025 10:00:00 GMT</pubDate></item>"
+    )
+    item = RSSNewsGatherer.parse_item(element)
+    assert item['title'] == 'Headline'
+    assert item['publisher'] == 'Example News'
+    assert item['link'] == 'https://news.example/a'
+    assert item['published_at'] == datetime.datetime(2025, 1, 6, 10, tzinfo=datetime.timezone.utc).timestamp()
+
+def test_parse_item_ignores_bad_pub_date():
+    element = ElementTree.fromstring(
+        "<item><title>Headline - Other</title><link>https://news.example/b</link>"
+        "<source>Example News</source><pubDate>yesterday</pubDate></item>"
+    )
+    item = RSSNewsGatherer.parse_item(element)
+    assert item['title'] == 'Headline - Other'
+    assert item['published_at'] is None
+
+def test_range_days():
+    assert make_gatherer('7d').range_days() == 7
+    assert make_gatherer('1m').range_days() == 30
+    assert make_gatherer('anytime').range_days() == 365
+    assert make_gatherer('soon').range_days() == 0
+
+def test_date_windows():
+    assert make_gatherer(number_of_urls=100).date_windows() == [None]
+    assert make_gatherer('soon').date_windows() == [None]
+    today = datetime.date(2025, 1, 31)
+    windows = make_gatherer(max_windows=4).date_windows(today)
+    assert len(windows) == 4
+    assert windows[0][1] == today + datetime.timedelta(days=1)
+    assert windows[-1][0] == today + datetime.timedelta(days=1) - datetime.timedelta(days=30)
+    for newer, older in zip(windows, windows[1:]):
+        assert older[1] == newer[0]
+        assert older[0] < newer[0]
+
+class StubContent:
+    def __init__(self, body):
+        self.body = body
+
+    async def iter_chunked(self, size):
+        for start in range(0, len(self.body), size):
+            yield self.body[start:start + size]
+
+class StubResponse:
+    def __init__(self, body):
+        self.content = StubContent(body)
+
+    def raise_for_status(self):
+        pass
+
+class StubSession:
+    """
+    Serves the same feed for every window, as Google News does when windows overlap.
+    """
+    def __init__(self, links):
+        self.body = ("<rss><channel>" + "".join(
+            f"<item><title>{link}</title><link>{link}</link></item>" for link in links
+        ) + "</channel></rss>").encode()
+        self.requests = 0
+
+    @asynccontextmanager
+    async def get(self, url, headers=None):
+        self.requests += 1
+        yield StubResponse(self.body)
+
+def test_gather_counts_only_unique_links():
+    gatherer = make_gatherer(number_of_urls=150, chunk_size=64)
+    links = [f"https://news.example/{i}" for i in range(3)]
+    session = StubSession(links + links[::-1])
+
+    async def gather():
+        # The limits open_session would set up, without the real HTTP session
+        gatherer.semaphore = asyncio.Semaphore(gatherer.max_concurrency)
+        gatherer.rate_limiter = HostRateLimiter(0)
+        return await gatherer.gather_news_links('q', session)
+    gathered = asyncio.run(gather())
+    assert gathered == links
+    assert session.requests == len(gatherer.date_windows())
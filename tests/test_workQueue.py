@@ -0,0 +1,73 @@
+import time
+import pytest
+from workQueue import WorkQueue
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = WorkQueue(str(tmp_path / 'queue.db'), visibility_timeout=0.2, max_attempts=2, retry_delay=0)
+    yield queue
+    queue.close()
+
+def test_put_is_idempotent(queue):
+    assert queue.put('resolve', 'run', 1, {'link': 'a'})
+    assert not queue.put('resolve', 'run', 1, {'link': 'a'})
+    assert queue.stats('run') == {'resolve': {'ready': 1}}
+
+def test_leased_task_is_invisible_until_it_expires(queue):
+    queue.put('resolve', 'run', 1, {'link': 'a'})
+    task, = queue.lease(['resolve'], 'worker-a')
+    assert task['payload'] == {'link': 'a'}
+    assert task['attempts'] == 1
+    assert queue.lease(['resolve'], 'worker-b') == []
+
+    time.sleep(0.3)
+    expired, = queue.lease(['resolve'], 'worker-b')
+    assert expired['id'] == task['id']
+    assert expired['attempts'] == 2
+
+def test_complete_enqueues_follow_ups(queue):
+    queue.put('resolve', 'run', 1, {'link': 'a'})
+    task, = queue.lease(['resolve'], 'worker-a')
+    assert queue.complete(task, 'worker-a', [('scrape', {'url': 'b'})])
+    assert queue.stats('run') == {'resolve': {'done': 1}, 'scrape': {'ready': 1}}
+    follow_up, = queue.lease(['scrape'], 'worker-a')
+    assert follow_up['article_id'] == 1
+    assert follow_up['payload'] == {'url': 'b'}
+
+def test_complete_after_lost_lease_changes_nothing(queue):
+    queue.put('resolve', 'run', 1, {'link': 'a'})
+    task, = queue.lease(['resolve'], 'worker-a')
+    time.sleep(0.3)
+    queue.lease(['resolve'], 'worker-b')
+    assert not queue.complete(task, 'worker-a', [('scrape', {'url': 'b'})])
+    assert queue.stats('run') == {'resolve': {'leased': 1}}
+
+def test_failed_task_is_retried_then_given_up(queue):
+    queue.put('resolve', 'run', 1, {'link': 'a'})
+    task, = queue.lease(['resolve'], 'worker-a')
+    queue.fail(task, 'worker-a', 'timeout')
+    task, = queue.lease(['resolve'], 'worker-a')
+    queue.fail(task, 'worker-a', 'timeout')
+    assert queue.lease(['resolve'], 'worker-a') == []
+    assert queue.stats('run') == {'resolve': {'failed': 1}}
+    assert queue.pending('run') == 0
+
+def test_expired_last_attempt_is_marked_failed(queue):
+    queue.put('resolve', 'run', 1, {'link': 'a'})
+    queue.lease(['resolve'], 'worker-a')
+    time.sleep(0.3)
+    queue.lease(['resolve'], 'worker-b')
+    time.sleep(0.3)
+    assert queue.lease(['resolve'], 'worker-c') == []
+    assert queue.stats('run') == {'resolve': {'failed': 1}}
+
+def test_expired_last_attempt_is_not_pending(queue):
+    queue.put('resolve', 'run', 1, {'link': 'a'})
+    queue.lease(['resolve'], 'worker-a')
+    time.sleep(0.3)
+    queue.lease(['resolve'], 'worker-b')
+    assert queue.pending('run') == 1
+    time.sleep(0.3)
+    # No worker leases again, as when they have all died
+    assert queue.pending('run') == 0
+    assert queue.stats('run') == {'resolve': {'failed': 1}}
@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from articleStore import ArticleStore
+from dedup import NearDuplicateDetector
+from googleNewsExtractor import NewsGatherer
+from rssNewsGatherer import RSSNewsGatherer
+from linkResolver import HTTPLinkResolver
+from linkScraper import WebScraper
+from pipeline import NewsPipeline
+from seenIndex import SeenIndex
+from summarizer import ArticleSummarizer
+
+class NewsWatcher:
+    """
+    Headless monitoring loop: re-run the configured queries every interval seconds
+    and push only articles that have not been seen before through resolution,
+    scraping and summarization. Results are appended to the article store and,
+    optionally, to a JSON Lines file.
+    Inputs:
+    search_queries : list of str
+    interval : float
+        The number of seconds between the start of two cycles.
+    date_of_news, location, language : str
+        Passed on to NewsGatherer.
+    urls_per_cycle : int, optional
+        The maximum number of new links processed per cycle (default is 50).
+    store : ArticleStore, optional
+        The store results are appended to (default is sentinel.db).
+    seen_index : SeenIndex, optional
+        The persistent index of processed links and URLs (default is seen_index.db).
+    output_file : str, optional
+        A JSON Lines file every new summary is appended to (default is None).
+    ingestion : str, optional
+        'html' to read the Google News search page or 'rss' to read its RSS feed (default is 'html').
+    """
+    def __init__(self, search_queries, interval, date_of_news="1d", location="IN", language="en",
+                 urls_per_cycle=50, store=None, seen_index=None, output_file=None, ingestion='html'):
+        self.search_queries = search_queries
+        self.interval = interval
+        self.date_of_news = date_of_news
+        self.location = location
+        self.language = language
+        self.urls_per_cycle = urls_per_cycle
+        self.store = store or ArticleStore()
+        self.seen_index = seen_index or SeenIndex()
+        self.output_file = output_file
+        self.gatherer_class = RSSNewsGatherer if ingestion == 'rss' else NewsGatherer
+        self.link_resolver = HTTPLinkResolver(cache_file="resolved_links.json")
+        self.summarizer = ArticleSummarizer()
+
+    def append_result(self, article):
+        if not self.output_file:
+            return
+        record = {key: article.get(key) for key in ('query', 'link', 'url', 'title', 'summary', 'publisher', 'published_at')}
+        record['summarized_at'] = time.time()
+        with open(self.output_file, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record) + '\n')
+
+    async def run_cycle(self):
+        news_gatherer = self.gatherer_class(self.search_queries, self.date_of_news, self.urls_per_cycle, None,
+                                            self.location, self.language)
+        pipeline = NewsPipeline(news_gatherer, self.link_resolver, WebScraper(None), self.summarizer,
+                                store=self.store, seen_index=self.seen_index,
+                                deduplicator=NearDuplicateDetector())
+        count = 0
+        async for article in pipeline.stream():
+            self.append_result(article)
+            count += 1
+        return count
+
+    def run(self, cycles=None):
+        """
+        Run cycles forever, or cycles times if given.
+        """
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            start = time.time()
+            count = asyncio.run(self.run_cycle())
+            cycle += 1
+            logging.info(f"Watch cycle {cycle}: {count} new articles in {time.time() - start:.2f} seconds, "
+                         f"{self.seen_index.count('link')} links seen so far")
+            if cycles is not None and cycle >= cycles:
+                break
+            time.sleep(max(0, self.interval - (time.time() - start)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep watch over Google News and summarize new articles.")
+    parser.add_argument("queries", nargs="+", help="search queries to monitor")
+    parser.add_argument("--interval", type=float, default=900, help="seconds between cycles (default 900)")
+    parser.add_argument("--date-range", default="1d", help="Google News date range (default 1d)")
+    parser.add_argument("--location", default="IN")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--urls-per-cycle", type=int, default=50)
+    parser.add_argument("--db", default="sentinel.db", help="article store path")
+    parser.add_argument("--seen-db", default="seen_index.db", help="seen-index path")
+    parser.add_argument("--output", help="JSON Lines file to append new summaries to")
+    parser.add_argument("--ingestion", default="html", choices=["html", "rss"],
+                        help="read the Google News search page or its RSS feed (default html)")
+    parser.add_argument("--cycles", type=int, help="stop after this many cycles")
+    args = parser.parse_args()
+
+    watcher = NewsWatcher(args.queries, args.interval, args.date_range, args.location, args.language,
+                          args.urls_per_cycle, ArticleStore(args.db), SeenIndex(args.seen_db), args.output,
+                          args.ingestion)
+    watcher.run(args.cycles)
@@ -0,0 +1,186 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+class WorkQueue:
+    """
+    Durable task queue in a SQLite file, shared by any number of worker processes
+    on one host. The file is in WAL mode, which SQLite does not support on network
+    filesystems, so it must not be shared between machines.
+    A worker leases tasks for a visibility timeout; a task whose lease runs out
+    before it is completed (the worker died or hung) becomes visible to other
+    workers again. Failed tasks are retried with exponential backoff until they
+    have been attempted max_attempts times, then marked failed.
+    Task ids are derived from the stage and article, so enqueuing the same work
+    twice is a no-op, and completing a task only counts (and only enqueues its
+    follow-up tasks) while the completing worker still holds the lease.
+    Inputs:
+    path : str, optional
+        The file path of the queue database (default is work_queue.db).
+    visibility_timeout : float, optional
+        The number of seconds a lease lasts (default is 300).
+    max_attempts : int, optional
+        The number of times a task is tried before it is marked failed (default is 3).
+    retry_delay : float, optional
+        The delay in seconds before the first retry, doubled on every further one (default is 5).
+    """
+    def __init__(self, path='work_queue.db', visibility_timeout=300, max_attempts=3, retry_delay=5):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lock = threading.Lock()
+        # Transactions are opened explicitly with BEGIN IMMEDIATE, so two processes never lease the same task
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.transaction():
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, stage TEXT NOT NULL, run_id TEXT, article_id INTEGER, payload TEXT NOT NULL, "
+                "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, lease_owner TEXT, lease_expires_at REAL, "
+                "available_at REAL NOT NULL, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (stage, status, available_at)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_run ON tasks (run_id, status)")
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.connection
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+
+    @staticmethod
+    def task_id(stage, article_id):
+        return f"{stage}:{article_id}"
+
+    def insert(self, connection, stage, run_id, article_id, payload, now):
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO tasks (id, stage, run_id, article_id, payload, status, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 'ready', ?, ?, ?)",
+            (self.task_id(stage, article_id), stage, run_id, article_id, json.dumps(payload), now, now, now)
+        )
+        return cursor.rowcount == 1
+
+    def put(self, stage, run_id, article_id, payload=None):
+        """
+        Enqueue a task and return True, or False if it was already enqueued.
+        """
+        with self.transaction() as connection:
+            return self.insert(connection, stage, run_id, article_id, payload or {}, time.time())
+
+    def expire(self, connection, now, stages=None):
+        """
+        Mark failed the leased tasks (of the given stages, or all) whose last
+        allowed attempt ran out of time, as no worker will lease them again.
+        """
+        sql = ("UPDATE tasks SET status = 'failed', error = 'lease expired', lease_owner = NULL, updated_at = ? "
+               "WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?")
+        params = [now, now, self.max_attempts]
+        if stages is not None:
+            sql += f" AND stage IN ({','.join('?' * len(stages))})"
+            params += stages
+        connection.execute(sql, params)
+
+    def lease(self, stages, owner, limit=1):
+        """
+        Lease up to limit ready tasks of the given stages for owner, oldest first.
+        Returns a list of task dicts (id, stage, run_id, article_id, payload, attempts).
+        """
+        stages = list(stages)
+        placeholders = ','.join('?' * len(stages))
+        now = time.time()
+        with self.transaction() as connection:
+            self.expire(connection, now, stages)
+            rows = connection.execute(
+                f"SELECT id, stage, run_id, article_id, payload, attempts FROM tasks "
+                f"WHERE stage IN ({placeholders}) AND ((status = 'ready' AND available_at <= ?) "
+                f"OR (status = 'leased' AND lease_expires_at < ?)) ORDER BY created_at LIMIT ?",
+                stages + [now, now, limit]
+            ).fetchall()
+            connection.executemany(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                [(owner, now + self.visibility_timeout, now, row[0]) for row in rows]
+            )
+        return [
+            {'id': task_id, 'stage': stage, 'run_id': run_id, 'article_id': article_id,
+             'payload': json.loads(payload), 'attempts': attempts + 1}
+            for task_id, stage, run_id, article_id, payload, attempts in rows
+        ]
+
+    def complete(self, task, owner, follow_ups=()):
+        """
+        Mark a leased task done and enqueue its follow-ups, (stage, payload) pairs
+        for the same article, in one transaction. Returns False, and changes
+        nothing, if owner's lease has expired and the task went to another worker.
+        """
+        now = time.time()
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE tasks SET status = 'done', lease_owner = NULL, error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (now, task['id'], owner)
+            )
+            if cursor.rowcount != 1:
+                return False
+            for stage, payload in follow_ups:
+                self.insert(connection, stage, task['run_id'], task['article_id'], payload, now)
+        return True
+
+    def fail(self, task, owner, error):
+        """
+        Release a leased task after an error: it is retried after a backoff, or
+        marked failed once it has been attempted max_attempts times.
+        """
+        now = time.time()
+        with self.transaction() as connection:
+            row = connection.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND status = 'leased' AND lease_owner = ?", (task['id'], owner)
+            ).fetchone()
+            if row is None:
+                return
+            if row[0] >= self.max_attempts:
+                connection.execute(
+                    "UPDATE tasks SET status = 'failed', lease_owner = NULL, error = ?, updated_at = ? WHERE id = ?",
+                    (str(error), now, task['id'])
+                )
+            else:
+                connection.execute(
+                    "UPDATE tasks SET status = 'ready', lease_owner = NULL, error = ?, available_at = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (str(error), now + self.retry_delay * 2 ** (row[0] - 1), now, task['id'])
+                )
+
+    def stats(self, run_id=None):
+        """
+        Return {stage: {status: count}}, for one run or for the whole queue.
+        Expired last attempts are marked failed first, so a run whose workers all
+        died is not counted as pending forever.
+        """
+        sql = "SELECT stage, status, COUNT(*) FROM tasks"
+        params = ()
+        if run_id is not None:
+            sql += " WHERE run_id = ?"
+            params = (run_id,)
+        with self.transaction() as connection:
+            self.expire(connection, time.time())
+            rows = connection.execute(sql + " GROUP BY stage, status", params).fetchall()
+        stats = {}
+        for stage, status, count in rows:
+            stats.setdefault(stage, {})[status] = count
+        return stats
+
+    def pending(self, run_id=None):
+        return sum(count for statuses in self.stats(run_id).values()
+                   for status, count in statuses.items() if status in ('ready', 'leased'))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()